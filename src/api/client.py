@@ -1,13 +1,20 @@
 """
 Korea Investment API Client
 """
-import aiohttp
 import asyncio
-from typing import Dict, Optional
+import hashlib
+import httpx
+import orjson
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
 from datetime import datetime, timedelta
 import logging
 
-from ..utils.retry import retry_on_error, APIError, RateLimitError
+from ..utils.retry import (
+    retry_on_error, parse_retry_after, AsyncTokenBucket, APIError, RateLimitError
+)
 from ..config import get_settings
 
 
@@ -17,27 +24,155 @@ logger = logging.getLogger(__name__)
 class KoreaInvestmentAPI:
     """Korea Investment API client"""
     
+    # Refresh the token this many seconds before the server-side expiry
+    TOKEN_REFRESH_MARGIN = 60
+    
+    # Endpoint key -> (path, tr_id)
+    ENDPOINTS = {
+        "price": ("/uapi/domestic-stock/v1/quotations/inquire-index-price", "FHKUP03500100"),
+        "chart": ("/uapi/domestic-stock/v1/quotations/inquire-index-chart-price", "FHKUP03500200"),
+        "summary": ("/uapi/domestic-stock/v1/quotations/inquire-market-summary", "FHKUP03500300"),
+        "sector": ("/uapi/domestic-stock/v1/quotations/inquire-sector-data", "FHKUP03500400"),
+    }
+    
+    # Only historical chart data is stable enough for ETag revalidation to pay off
+    CONDITIONAL_ENDPOINTS = frozenset({"chart"})
+    CONDITIONAL_CACHE_SIZE = 64
+    
     def __init__(self, app_key: str, app_secret: str, base_url: Optional[str] = None):
         self.app_key = app_key
         self.app_secret = app_secret
-        self.base_url = base_url or get_settings().korea_investment_base_url
+        settings = get_settings()
+        self.base_url = base_url or settings.korea_investment_base_url
         self.access_token: Optional[str] = None
-        self.token_expires: Optional[datetime] = None
+        self._token_expires_mono: float = 0.0
         self._token_lock = asyncio.Lock()
-        self._session: Optional[aiohttp.ClientSession] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+        # Request key -> (conditional request headers, last raw body), in LRU order
+        self._conditional: "OrderedDict[tuple, Tuple[Dict[str, str], bytes]]" = OrderedDict()
+        # A non-positive quota means no client-side rate limiting
+        self._limiter: Optional[AsyncTokenBucket] = None
+        if settings.max_requests_per_minute > 0:
+            self._limiter = AsyncTokenBucket(
+                settings.max_requests_per_minute,
+                settings.max_requests_per_minute / 60
+            )
+        
+        # Static request headers per endpoint; only authorization changes
+        self._auth_token: Optional[str] = None
+        self._auth_header: Optional[str] = None
+        self._base_headers = {"appkey": app_key, "appsecret": app_secret}
+        self._headers = {
+            key: {**self._base_headers, "tr_id": tr_id}
+            for key, (_, tr_id) in self.ENDPOINTS.items()
+        }
+        
+        # Token persisted across restarts, one file per credential set
+        self._token_cache_path: Optional[str] = None
+        if settings.token_cache_path:
+            root, ext = os.path.splitext(settings.token_cache_path)
+            digest = hashlib.sha256(app_key.encode()).hexdigest()[:16]
+            self._token_cache_path = f"{root}.{digest}{ext}"
+            self._load_cached_token()
+    
+    @property
+    def token_expires(self) -> Optional[datetime]:
+        """Wall-clock time at which the cached token will be refreshed"""
+        if not self._token_expires_mono:
+            return None
+        return datetime.now() + timedelta(
+            seconds=self._token_expires_mono - time.monotonic()
+        )
+    
+    @token_expires.setter
+    def token_expires(self, value: Optional[datetime]):
+        if value is None:
+            self._token_expires_mono = 0.0
+        else:
+            self._token_expires_mono = time.monotonic() + (
+                value - datetime.now()
+            ).total_seconds()
+    
+    def _load_cached_token(self):
+        """Restore a still-valid access token saved by a previous process"""
+        try:
+            with open(self._token_cache_path, "rb") as f:
+                data = orjson.loads(f.read())
+            token = data["token"]
+            remaining = float(data["expires_at"]) - time.time()
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.debug("Ignoring unreadable token cache: %s", e)
+            return
+        
+        if token and remaining > 0:
+            self.access_token = token
+            self._token_expires_mono = time.monotonic() + remaining
+            logger.info("Loaded access token from cache")
+    
+    def _save_cached_token(self):
+        """Atomically persist the current access token and its refresh deadline"""
+        if not self._token_cache_path:
+            return
+        
+        # Monotonic time does not survive a restart, so store wall-clock expiry
+        payload = orjson.dumps({
+            "token": self.access_token,
+            "expires_at": time.time() + (self._token_expires_mono - time.monotonic())
+        })
+        tmp_path = f"{self._token_cache_path}.tmp"
+        try:
+            directory = os.path.dirname(self._token_cache_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+            os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, self._token_cache_path)
+        except OSError as e:
+            logger.warning("Failed to write token cache: %s", e)
+    
+    async def _get_client(self) -> httpx.AsyncClient:
+        """Get shared HTTP client, creating it on first use"""
+        if self._client is None or self._client.is_closed:
+            # Single upstream host: HTTP/2 multiplexes concurrent calls over one
+            # connection, and a long keepalive avoids new TLS handshakes between polls
+            self._client = httpx.AsyncClient(
+                http2=True,
+                limits=httpx.Limits(
+                    max_connections=10,
+                    max_keepalive_connections=4,
+                    keepalive_expiry=120
+                ),
+                timeout=httpx.Timeout(15.0, connect=5.0, read=10.0)
+            )
+        return self._client
+    
+    def _with_auth(self, headers: Dict[str, str], token: str) -> Dict[str, str]:
+        """Stamp the bearer token onto a cached header template"""
+        if token != self._auth_token:
+            self._auth_token = token
+            self._auth_header = f"Bearer {token}"
+        headers["authorization"] = self._auth_header
+        return headers
     
     async def close(self):
-        """Close HTTP session"""
-        if self._session and not self._session.closed:
-            await self._session.close()
+        """Close HTTP client"""
+        if self._client and not self._client.is_closed:
+            await self._client.aclose()
     
     async def _get_access_token(self) -> str:
         """Get or refresh access token"""
+        # Fast path: valid token, no need to contend for the lock
+        if self.access_token and time.monotonic() < self._token_expires_mono:
+            return self.access_token
+        
         async with self._token_lock:
-            # Check if current token is still valid
-            if (self.access_token and 
-                self.token_expires and 
-                self.token_expires > datetime.now()):
+            # Re-check after acquiring lock (another caller may have refreshed)
+            if self.access_token and time.monotonic() < self._token_expires_mono:
                 return self.access_token
             
             # Request new token
@@ -48,73 +183,154 @@ class KoreaInvestmentAPI:
                 "appsecret": self.app_secret
             }
             
-            async with aiohttp.ClientSession() as session:
-                try:
-                    async with session.post(
-                        f"{self.base_url}/oauth2/tokenP",
-                        headers=headers,
-                        json=body
-                    ) as response:
-                        if response.status == 429:
-                            raise RateLimitError("Token request rate limit exceeded")
-                        elif response.status != 200:
-                            raise APIError(f"Token request failed with status {response.status}")
-                        
-                        data = await response.json()
-                        self.access_token = data["access_token"]
-                        self.token_expires = datetime.now() + timedelta(
-                            seconds=data.get("expires_in", 3600)
-                        )
-                        
-                        logger.info("Successfully obtained new access token")
-                        return self.access_token
-                        
-                except aiohttp.ClientError as e:
-                    raise APIError(f"Token request failed: {str(e)}")
+            client = await self._get_client()
+            try:
+                response = await client.post(
+                    f"{self.base_url}/oauth2/tokenP",
+                    headers=headers,
+                    content=orjson.dumps(body)
+                )
+            except httpx.HTTPError as e:
+                raise APIError(op="Token request", detail=e)
+            
+            if response.status_code == 429:
+                raise RateLimitError(
+                    "Token request rate limit exceeded",
+                    retry_after=parse_retry_after(response.headers.get("Retry-After"))
+                )
+            elif response.status_code != 200:
+                raise APIError(op="Token request", status=response.status_code)
+            
+            data = orjson.loads(response.content)
+            self.access_token = data["access_token"]
+            self._token_expires_mono = (
+                time.monotonic()
+                + data.get("expires_in", 3600)
+                - self.TOKEN_REFRESH_MARGIN
+            )
+            self._auth_token = self.access_token
+            self._auth_header = f"Bearer {self.access_token}"
+            self._save_cached_token()
+            
+            logger.info("Successfully obtained new access token")
+            return self.access_token
     
-    @retry_on_error(max_attempts=3, delay=1.0, exceptions=(APIError,))
-    async def get_index_price(self, index_code: str) -> Dict:
+    async def _request(self, key: tuple, fetch: Callable[[], Awaitable[Dict]]) -> Dict:
         """
-        Get index current price
+        Run fetch once per key; concurrent identical requests share its result
         
         Args:
-            index_code: Index code (0001 for KOSPI, 1001 for KOSDAQ)
+            key: Request identity (tr_id and sorted params)
+            fetch: Zero-argument coroutine factory performing the request
+            
+        Returns:
+            API response dictionary
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fetch())
+            self._inflight[key] = task
             
+            def _forget(done: asyncio.Future):
+                if self._inflight.get(key) is done:
+                    del self._inflight[key]
+            
+            task.add_done_callback(_forget)
+        # Shield so one caller's cancellation does not cancel the shared request
+        return await asyncio.shield(task)
+    
+    async def _get_json(
+        self, path: str, headers: Dict[str, str], params: Dict[str, str], key: tuple,
+        conditional: bool = False
+    ) -> Dict:
+        """Perform a GET request, conditional if requested, and decode the JSON response"""
+        # Stay under the per-minute quota rather than discovering it via 429
+        if self._limiter is not None:
+            await self._limiter.acquire()
+        
+        # Revalidate a previous response instead of re-downloading it
+        cached = self._conditional.get(key) if conditional else None
+        if cached is not None:
+            headers = {**headers, **cached[0]}
+        
+        client = await self._get_client()
+        try:
+            response = await client.get(
+                f"{self.base_url}{path}",
+                headers=headers,
+                params=params
+            )
+        except httpx.HTTPError as e:
+            raise APIError(detail=e)
+        
+        if response.status_code == 429:
+            raise RateLimitError(
+                "API rate limit exceeded",
+                retry_after=parse_retry_after(response.headers.get("Retry-After"))
+            )
+        elif response.status_code == 304 and cached is not None:
+            # Decode afresh so callers never share (and mutate) one body
+            self._conditional.move_to_end(key)
+            return orjson.loads(cached[1])
+        elif response.status_code != 200:
+            raise APIError(status=response.status_code)
+        
+        data = orjson.loads(response.content)
+        if not conditional:
+            return data
+        
+        validators = {}
+        etag = response.headers.get("ETag")
+        if etag:
+            validators["If-None-Match"] = etag
+        last_modified = response.headers.get("Last-Modified")
+        if last_modified:
+            validators["If-Modified-Since"] = last_modified
+        if validators:
+            self._conditional[key] = (validators, response.content)
+            self._conditional.move_to_end(key)
+            if len(self._conditional) > self.CONDITIONAL_CACHE_SIZE:
+                self._conditional.popitem(last=False)
+        
+        return data
+    
+    @retry_on_error(max_attempts=3, delay=1.0, exceptions=(APIError,))
+    async def _get(self, endpoint: str, params: Dict[str, str]) -> Dict:
+        """
+        Issue an authenticated GET against a known endpoint
+        
+        Args:
+            endpoint: Key into ENDPOINTS
+            params: Query parameters
+        
         Returns:
             API response dictionary
         """
+        path, tr_id = self.ENDPOINTS[endpoint]
         token = await self._get_access_token()
+        headers = self._with_auth(self._headers[endpoint], token)
         
-        headers = {
-            "authorization": f"Bearer {token}",
-            "appkey": self.app_key,
-            "appsecret": self.app_secret,
-            "tr_id": "FHKUP03500100"
-        }
+        key = (tr_id, tuple(sorted(params.items())))
+        conditional = endpoint in self.CONDITIONAL_ENDPOINTS
+        return await self._request(
+            key, lambda: self._get_json(path, headers, params, key, conditional=conditional)
+        )
+    
+    async def get_index_price(self, index_code: str) -> Dict:
+        """
+        Get index current price
         
-        params = {
+        Args:
+            index_code: Index code (0001 for KOSPI, 1001 for KOSDAQ)
+        
+        Returns:
+            API response dictionary
+        """
+        return await self._get("price", {
             "FID_COND_MRKT_DIV_CODE": "U",
             "FID_INPUT_ISCD": index_code
-        }
-        
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.get(
-                    f"{self.base_url}/uapi/domestic-stock/v1/quotations/inquire-index-price",
-                    headers=headers,
-                    params=params
-                ) as response:
-                    if response.status == 429:
-                        raise RateLimitError("API rate limit exceeded")
-                    elif response.status != 200:
-                        raise APIError(f"API request failed with status {response.status}")
-                    
-                    return await response.json()
-                    
-            except aiohttp.ClientError as e:
-                raise APIError(f"API request failed: {str(e)}")
+        })
     
-    @retry_on_error(max_attempts=3, delay=1.0, exceptions=(APIError,))
     async def get_index_chart_data(
         self, 
         index_code: str, 
@@ -132,40 +348,13 @@ class KoreaInvestmentAPI:
         Returns:
             API response dictionary
         """
-        token = await self._get_access_token()
-        
-        headers = {
-            "authorization": f"Bearer {token}",
-            "appkey": self.app_key,
-            "appsecret": self.app_secret,
-            "tr_id": "FHKUP03500200"
-        }
-        
-        params = {
+        return await self._get("chart", {
             "FID_COND_MRKT_DIV_CODE": "U",
             "FID_INPUT_ISCD": index_code,
             "FID_PERIOD_DIV_CODE": period_div_code,
             "FID_INPUT_DATE_1": input_date
-        }
-        
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.get(
-                    f"{self.base_url}/uapi/domestic-stock/v1/quotations/inquire-index-chart-price",
-                    headers=headers,
-                    params=params
-                ) as response:
-                    if response.status == 429:
-                        raise RateLimitError("API rate limit exceeded")
-                    elif response.status != 200:
-                        raise APIError(f"API request failed with status {response.status}")
-                    
-                    return await response.json()
-                    
-            except aiohttp.ClientError as e:
-                raise APIError(f"API request failed: {str(e)}")
+        })
     
-    @retry_on_error(max_attempts=3, delay=1.0, exceptions=(APIError,))
     async def get_market_summary(self) -> Dict:
         """
         Get market summary data
@@ -173,37 +362,8 @@ class KoreaInvestmentAPI:
         Returns:
             API response dictionary
         """
-        token = await self._get_access_token()
-        
-        headers = {
-            "authorization": f"Bearer {token}",
-            "appkey": self.app_key,
-            "appsecret": self.app_secret,
-            "tr_id": "FHKUP03500300"
-        }
-        
-        params = {
-            "FID_COND_MRKT_DIV_CODE": "U"
-        }
-        
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.get(
-                    f"{self.base_url}/uapi/domestic-stock/v1/quotations/inquire-market-summary",
-                    headers=headers,
-                    params=params
-                ) as response:
-                    if response.status == 429:
-                        raise RateLimitError("API rate limit exceeded")
-                    elif response.status != 200:
-                        raise APIError(f"API request failed with status {response.status}")
-                    
-                    return await response.json()
-                    
-            except aiohttp.ClientError as e:
-                raise APIError(f"API request failed: {str(e)}")
+        return await self._get("summary", {"FID_COND_MRKT_DIV_CODE": "U"})
     
-    @retry_on_error(max_attempts=3, delay=1.0, exceptions=(APIError,))
     async def get_sector_data(self) -> Dict:
         """
         Get sector performance data
@@ -211,32 +371,4 @@ class KoreaInvestmentAPI:
         Returns:
             API response dictionary
         """
-        token = await self._get_access_token()
-        
-        headers = {
-            "authorization": f"Bearer {token}",
-            "appkey": self.app_key,
-            "appsecret": self.app_secret,
-            "tr_id": "FHKUP03500400"
-        }
-        
-        params = {
-            "FID_COND_MRKT_DIV_CODE": "U"
-        }
-        
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.get(
-                    f"{self.base_url}/uapi/domestic-stock/v1/quotations/inquire-sector-data",
-                    headers=headers,
-                    params=params
-                ) as response:
-                    if response.status == 429:
-                        raise RateLimitError("API rate limit exceeded")
-                    elif response.status != 200:
-                        raise APIError(f"API request failed with status {response.status}")
-                    
-                    return await response.json()
-                    
-            except aiohttp.ClientError as e:
-                raise APIError(f"API request failed: {str(e)}")
\ No newline at end of file
+        return await self._get("sector", {"FID_COND_MRKT_DIV_CODE": "U"})
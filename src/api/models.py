@@ -3,11 +3,14 @@ Data models for Korea Investment API responses
 """
 from datetime import datetime
 from typing import List, Optional
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+from pydantic.dataclasses import dataclass
 
 
 class IndexData(BaseModel):
     """Index data model"""
+    model_config = ConfigDict(extra="ignore", frozen=True)
+    
     current: float = Field(..., gt=0, description="Current index value")
     change: float = Field(..., description="Change from previous close")
     change_rate: float = Field(..., description="Change rate percentage")
@@ -16,11 +19,14 @@ class IndexData(BaseModel):
     high: float = Field(..., gt=0, description="Day high")
     low: float = Field(..., gt=0, description="Day low") 
     open: float = Field(..., gt=0, description="Day open")
+    # Factory runs only when the caller omits the timestamp
     timestamp: datetime = Field(default_factory=datetime.now, description="Data timestamp")
 
 
-class ChartPoint(BaseModel):
-    """Single chart data point"""
+@dataclass(slots=True, frozen=True, config=ConfigDict(extra="ignore"))
+class ChartPoint:
+    """Single chart data point (slotted: charts hold thousands of these)"""
+    
     timestamp: datetime = Field(..., description="Data timestamp")
     open: float = Field(..., gt=0, description="Open price")
     high: float = Field(..., gt=0, description="High price")
@@ -31,6 +37,8 @@ class ChartPoint(BaseModel):
 
 class ChartData(BaseModel):
     """Chart data collection"""
+    model_config = ConfigDict(extra="ignore", frozen=True)
+    
     market: str = Field(..., description="Market name")
     period: str = Field(..., description="Chart period")
     interval: str = Field(..., description="Chart interval")
@@ -46,6 +54,8 @@ class ChartData(BaseModel):
 
 class SectorData(BaseModel):
     """Sector index data"""
+    model_config = ConfigDict(extra="ignore", frozen=True)
+    
     name: str = Field(..., min_length=1, description="Sector name")
     code: str = Field(..., description="Sector code")
     current: float = Field(..., gt=0, description="Current index value")
@@ -57,6 +67,8 @@ class SectorData(BaseModel):
 
 class MarketSummaryData(BaseModel):
     """Market summary statistics"""
+    model_config = ConfigDict(extra="ignore", frozen=True)
+    
     advancing: int = Field(..., ge=0, description="Number of advancing stocks")
     declining: int = Field(..., ge=0, description="Number of declining stocks") 
     unchanged: int = Field(..., ge=0, description="Number of unchanged stocks")
@@ -71,6 +83,8 @@ class MarketSummaryData(BaseModel):
 
 class MarketCompareData(BaseModel):
     """Market comparison data"""
+    model_config = ConfigDict(extra="ignore", frozen=True)
+    
     start: float = Field(..., gt=0, description="Start value")
     end: float = Field(..., gt=0, description="End value")
     change: float = Field(..., description="Change value")
@@ -2,13 +2,12 @@
 Configuration management for MCP Market Index Server
 """
 import os
+from functools import lru_cache
 from typing import Optional
 from pydantic import Field
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 
-load_dotenv()
-
 
 class Settings(BaseSettings):
     """Application settings"""
@@ -20,6 +19,9 @@ class Settings(BaseSettings):
         default="https://openapi.koreainvestment.com:9443",
         env="KOREA_INVESTMENT_BASE_URL"
     )
+    # File to persist the access token across restarts; off unless set. Keep it
+    # outside the repository, since it holds a live bearer token
+    token_cache_path: str = Field(default="", env="TOKEN_CACHE_PATH")
     
     # Cache Configuration
     cache_ttl_seconds: int = Field(default=5, env="CACHE_TTL_SECONDS")
@@ -45,13 +47,11 @@ class Settings(BaseSettings):
     model_config = {"env_file": ".env", "env_file_encoding": "utf-8"}
 
 
-# Global settings instance
-settings = Settings()
-
-
+@lru_cache(maxsize=1)
 def get_settings() -> Settings:
-    """Get application settings"""
-    return settings
+    """Get application settings, loading .env and validating on first use"""
+    load_dotenv()
+    return Settings()
 
 
 # API Endpoints for Korea Investment
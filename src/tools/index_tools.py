@@ -2,11 +2,12 @@
 MCP Tools for Index Data
 """
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
 import asyncio
+import time
 
 from ..api.client import KoreaInvestmentAPI
-from ..utils.cache import MarketDataCache
+from ..utils.cache import MarketDataCache, estimate_size
 from ..utils.data_processor import (
     MarketStatusDetector, DataFreshnessAnalyzer, DataQualityValidator, 
     TechnicalIndicatorCalculator, PerformanceTracker
@@ -14,6 +15,89 @@ from ..utils.data_processor import (
 from ..config import MARKET_CODES, CHART_PERIOD_CODES, CHART_INTERVAL_CODES
 
 
+# Market selector -> (market code name, result key) legs to fetch
+_MARKETS_FOR = {
+    "KOSPI": [("KOSPI", "kospi")],
+    "KOSDAQ": [("KOSDAQ", "kosdaq")],
+    "ALL": [("KOSPI", "kospi"), ("KOSDAQ", "kosdaq")]
+}
+
+# Index quote fields: (result key, API field, caster, default when absent)
+_INDEX_FIELDS = (
+    ("current", "bstp_nmix_prpr", float, 0.0),
+    ("change", "bstp_nmix_prdy_vrss", float, 0.0),
+    ("change_rate", "bstp_nmix_prdy_ctrt", float, 0.0),
+    ("volume", "acml_vol", int, 0),
+    ("amount", "acml_tr_pbmn", int, 0),
+    ("high", "bstp_nmix_hgpr", float, 0.0),
+    ("low", "bstp_nmix_lwpr", float, 0.0),
+    ("open", "bstp_nmix_oprc", float, 0.0)
+)
+
+# Per-market fallback keys tried when the API fails: specific fallback, then test key
+_FALLBACK_KEYS = {
+    market_name: (f"market_index_{market_name}_fallback", f"market_index_{market_name}_test")
+    for market_name in ("KOSPI", "KOSDAQ")
+}
+
+# Display arrows indexed by sign of change: 0 flat, 1 up, -1 down
+_DIR_ARROWS = ("→", "↑", "↓")
+
+
+async def _fetch_and_validate(
+    market_name: str,
+    cache: MarketDataCache,
+    api_client: KoreaInvestmentAPI,
+    start_time: datetime,
+    allow_fallback: bool
+) -> Tuple[Optional[Dict[str, Any]], Optional[str], bool, float, Optional[str]]:
+    """
+    Fetch, parse and quality-check one market index
+    
+    Returns:
+        (parsed data, error message, was cached, completeness delta, data source)
+    """
+    cache_key = f"market_index_{market_name}_{int(start_time.timestamp()) // 60}"
+    try:
+        # Probe without counting: get_or_fetch records this lookup's hit or miss
+        was_cached = cache.peek(cache_key) is not None
+        revalidating = cache.is_stale(cache_key)
+        
+        index_data = await cache.get_or_fetch(
+            cache_key,
+            lambda: api_client.get_index_price(MARKET_CODES[market_name]),
+            ttl=5,
+            stale_ttl=5
+        )
+        
+        parsed = _parse_index_data(index_data)
+        
+        # Add data quality validation
+        quality_result = DataQualityValidator.validate_index_data(parsed)
+        parsed["data_quality"] = quality_result["quality_score"]
+        parsed["anomalies_detected"] = quality_result["anomalies"]
+        parsed["validation_status"] = quality_result["validation_status"]
+        
+        if revalidating:
+            return parsed, None, True, 1, "stale_revalidating"
+        return parsed, None, was_cached, 1, None
+        
+    except Exception as e:
+        if allow_fallback:
+            # Try the original cache key first, then the fixed fallback keys
+            fallback_data = cache.peek(cache_key)
+            if not fallback_data:
+                for fallback_key in _FALLBACK_KEYS[market_name]:
+                    fallback_data = cache.peek(fallback_key)
+                    if fallback_data:
+                        break
+            
+            if fallback_data:
+                return _parse_index_data(fallback_data), None, False, 0.5, "fallback_cache"
+        
+        return None, str(e), False, 0, None
+
+
 async def get_market_index(
     market: str = "ALL",
     cache: MarketDataCache = None,
@@ -38,10 +122,12 @@ async def get_market_index(
         raise ValueError(f"Invalid market: {market}. Must be KOSPI, KOSDAQ, or ALL")
     
     start_time = datetime.now()
+    start_ns = time.perf_counter_ns()
     
     # Market status detection
-    market_status = MarketStatusDetector.get_market_status()
-    trading_session = MarketStatusDetector.get_trading_session()
+    market_status, trading_session = MarketStatusDetector.status_for_minute(
+        int(start_time.timestamp()) // 60
+    )
     
     result = {
         "timestamp": start_time.isoformat(),
@@ -51,114 +137,58 @@ async def get_market_index(
     
     cache_hits = 0
     data_completeness = 0
-    total_expected = 1 if market != "ALL" else 2
+    all_anomalies = []
+    total_quality_score = 0
+    quality_count = 0
+    legs = _MARKETS_FOR[market]
+    total_expected = len(legs)
     
     try:
-        if market in ["KOSPI", "ALL"]:
-            try:
-                cache_key = f"market_index_KOSPI_{start_time.strftime('%Y%m%d_%H%M')}"
-                was_cached = cache.get(cache_key) is not None
-                
-                kospi_data = await cache.get_or_fetch(
-                    cache_key,
-                    lambda: api_client.get_index_price(MARKET_CODES["KOSPI"]),
-                    ttl=5
+        # Independent network round-trips: run the legs concurrently. Each leg
+        # reports its own failure as a tagged result, so one failing leg does
+        # not cancel its sibling.
+        async with asyncio.TaskGroup() as tg:
+            tasks = [
+                tg.create_task(
+                    _fetch_and_validate(code, cache, api_client, start_time, allow_fallback)
                 )
-                
-                if was_cached:
-                    cache_hits += 1
-                
-                parsed_kospi = _parse_index_data(kospi_data)
-                
-                # Add data quality validation
-                quality_result = DataQualityValidator.validate_index_data(parsed_kospi)
-                parsed_kospi["data_quality"] = quality_result["quality_score"]
-                parsed_kospi["anomalies_detected"] = quality_result["anomalies"]
-                parsed_kospi["validation_status"] = quality_result["validation_status"]
-                
-                result["kospi"] = parsed_kospi
-                data_completeness += 1
-                
-            except Exception as e:
-                if allow_fallback:
-                    # Try to get cached data even if expired
-                    fallback_keys = [
-                        cache_key,  # Try the original cache key first
-                        f"market_index_KOSPI_fallback",  # Then specific fallback key
-                        f"market_index_KOSPI_test"  # Then test key
-                    ]
-                    fallback_data = None
-                    for fallback_key in fallback_keys:
-                        fallback_data = cache.get(fallback_key)
-                        if fallback_data:
-                            break
-                    
-                    if fallback_data:
-                        result["kospi"] = _parse_index_data(fallback_data)
-                        result["data_source"] = "fallback_cache"
-                        result["staleness_warning"] = "Using cached data due to API failure"
-                        data_completeness += 0.5
-                    else:
-                        result["kospi_error"] = str(e)
-                else:
-                    result["kospi_error"] = str(e)
+                for code, _ in legs
+            ]
         
-        if market in ["KOSDAQ", "ALL"]:
-            try:
-                cache_key = f"market_index_KOSDAQ_{start_time.strftime('%Y%m%d_%H%M')}"
-                was_cached = cache.get(cache_key) is not None
-                
-                kosdaq_data = await cache.get_or_fetch(
-                    cache_key,
-                    lambda: api_client.get_index_price(MARKET_CODES["KOSDAQ"]),
-                    ttl=5
-                )
-                
-                if was_cached:
-                    cache_hits += 1
-                
-                parsed_kosdaq = _parse_index_data(kosdaq_data)
-                
-                # Add data quality validation
-                quality_result = DataQualityValidator.validate_index_data(parsed_kosdaq)
-                parsed_kosdaq["data_quality"] = quality_result["quality_score"]
-                parsed_kosdaq["anomalies_detected"] = quality_result["anomalies"]
-                parsed_kosdaq["validation_status"] = quality_result["validation_status"]
-                
-                result["kosdaq"] = parsed_kosdaq
-                data_completeness += 1
-                
-            except Exception as e:
-                if allow_fallback:
-                    # Try to get cached data even if expired
-                    fallback_keys = [
-                        cache_key,  # Try the original cache key first
-                        f"market_index_KOSDAQ_fallback",  # Then specific fallback key
-                        f"market_index_KOSDAQ_test"  # Then test key
-                    ]
-                    fallback_data = None
-                    for fallback_key in fallback_keys:
-                        fallback_data = cache.get(fallback_key)
-                        if fallback_data:
-                            break
-                    
-                    if fallback_data:
-                        result["kosdaq"] = _parse_index_data(fallback_data)
-                        result["data_source"] = "fallback_cache"
-                        result["staleness_warning"] = "Using cached data due to API failure"
-                        data_completeness += 0.5
-                    else:
-                        result["kosdaq_error"] = str(e)
-                else:
-                    result["kosdaq_error"] = str(e)
+        for (_, key_name), task in zip(legs, tasks):
+            parsed, error, was_cached, completeness_delta, data_source = task.result()
+            if error is not None:
+                result[f"{key_name}_error"] = error
+                continue
+            
+            result[key_name] = parsed
+            data_completeness += completeness_delta
+            # Fallback data carries no quality fields
+            if "anomalies_detected" in parsed:
+                all_anomalies.extend(parsed["anomalies_detected"])
+            if "data_quality" in parsed:
+                total_quality_score += parsed["data_quality"]
+                quality_count += 1
+            if was_cached:
+                cache_hits += 1
+            if data_source == "fallback_cache":
+                result["data_source"] = data_source
+                result["staleness_warning"] = "Using cached data due to API failure"
+            elif data_source == "stale_revalidating" and "data_source" not in result:
+                result["data_source"] = data_source
+                result["staleness_warning"] = "Serving expired cached data while refreshing"
     
     except Exception as e:
         result["general_error"] = str(e)
     
+    # Single wall-clock read for the rest of the request
+    end_time = datetime.now()
+    
     # Data freshness analysis
     freshness_info = DataFreshnessAnalyzer.analyze_freshness(
         start_time, 
-        cache_hit=(cache_hits > 0)
+        cache_hit=(cache_hits > 0),
+        now=end_time
     )
     
     result["data_freshness"] = freshness_info["freshness"]
@@ -171,27 +201,14 @@ async def get_market_index(
         result["partial_data_warning"] = "Some market data unavailable"
     
     # Aggregate data quality info
-    all_anomalies = []
-    total_quality_score = 0
-    quality_count = 0
-    
-    for market_name in ["kospi", "kosdaq"]:
-        if market_name in result and isinstance(result[market_name], dict):
-            market_data = result[market_name]
-            if "anomalies_detected" in market_data:
-                all_anomalies.extend(market_data["anomalies_detected"])
-            if "data_quality" in market_data:
-                total_quality_score += market_data["data_quality"]
-                quality_count += 1
-    
     result["data_quality"] = total_quality_score / quality_count if quality_count > 0 else 100
     result["anomalies_detected"] = all_anomalies
     result["validation_status"] = "anomalies_detected" if all_anomalies else "valid"
     
     # Performance metrics
-    end_time = datetime.now()
     result["performance_metrics"] = PerformanceTracker.create_performance_metrics(
-        start_time, end_time, data_points=data_completeness, cache_hits=cache_hits
+        start_time, end_time, data_points=data_completeness, cache_hits=cache_hits,
+        execution_time=(time.perf_counter_ns() - start_ns) / 1e9
     )
     
     # Add formatted output for detailed format
@@ -233,7 +250,7 @@ async def get_index_chart(
         raise ValueError(f"Invalid interval: {interval}")
     
     # Get chart data from API via cache
-    cache_key = f"chart_data_{market}_{period}_{interval}_{datetime.now().strftime('%Y%m%d_%H%M')}"
+    cache_key = f"chart_data_{market}_{period}_{interval}_{int(time.time()) // 60}"
     
     chart_response = await cache.get_or_fetch(
         cache_key,
@@ -266,7 +283,7 @@ async def get_index_chart(
     # Add processing stats
     response["processing_stats"] = {
         "data_points": len(chart_data),
-        "memory_usage": len(str(chart_data)),
+        "memory_usage": estimate_size(chart_data),
         "optimization_applied": len(chart_data) > 50
     }
     
@@ -275,33 +292,31 @@ async def get_index_chart(
 
 def _parse_index_data(api_response: Dict) -> Dict[str, Any]:
     """Parse API response to index data format"""
-    output = api_response.get("output", {})
+    output = api_response.get("output") or {}
     
     return {
-        "current": float(output.get("bstp_nmix_prpr", "0")),
-        "change": float(output.get("bstp_nmix_prdy_vrss", "0")),
-        "change_rate": float(output.get("bstp_nmix_prdy_ctrt", "0")),
-        "volume": int(output.get("acml_vol", "0")),
-        "amount": int(output.get("acml_tr_pbmn", "0")),
-        "high": float(output.get("bstp_nmix_hgpr", "0")),
-        "low": float(output.get("bstp_nmix_lwpr", "0")),
-        "open": float(output.get("bstp_nmix_oprc", "0"))
+        key: cast(output[field]) if field in output else default
+        for key, field, cast, default in _INDEX_FIELDS
     }
 
 
 def _parse_chart_data(api_response: Dict) -> list:
     """Parse API response to chart data format"""
     output = api_response.get("output2", [])
+    # Local bindings keep the per-point lookups off the attribute/global path
+    parse_date, to_float, to_int = _parse_date, float, int
     
     chart_points = []
+    append = chart_points.append
     for item in output:
-        chart_points.append({
-            "timestamp": _parse_date(item.get("stck_bsop_date", "20240101")),
-            "open": float(item.get("stck_oprc", "0")),
-            "high": float(item.get("stck_hgpr", "0")),
-            "low": float(item.get("stck_lwpr", "0")),
-            "close": float(item.get("stck_clpr", "0")),
-            "volume": int(item.get("acml_vol", "0"))
+        get = item.get
+        append({
+            "timestamp": parse_date(get("stck_bsop_date", "20240101")),
+            "open": to_float(get("stck_oprc", 0.0)),
+            "high": to_float(get("stck_hgpr", 0.0)),
+            "low": to_float(get("stck_lwpr", 0.0)),
+            "close": to_float(get("stck_clpr", 0.0)),
+            "volume": to_int(get("acml_vol", 0))
         })
     
     return chart_points
@@ -338,23 +353,34 @@ def _create_formatted_values(result: Dict[str, Any]) -> Dict[str, Any]:
     return formatted
 
 
+def _format_market_line(market_name: str, data: Dict[str, Any]) -> str:
+    """Format one market's display line"""
+    current = data.get('current', 0)
+    change = data.get('change', 0)
+    change_rate = data.get('change_rate', 0)
+    
+    direction = _DIR_ARROWS[(change > 0) - (change < 0)]
+    return f"{market_name}: {current:,.2f} {direction} {change:+,.2f} ({change_rate:+.2f}%)"
+
+
 def _create_display_text(result: Dict[str, Any]) -> str:
     """Create human-readable display text"""
-    lines = []
-    lines.append(f"Market Status: {result.get('market_status', 'unknown').title()}")
-    lines.append(f"Trading Session: {result.get('trading_session', 'unknown').replace('_', ' ').title()}")
-    lines.append("")
+    header = (
+        f"Market Status: {result.get('market_status', 'unknown').title()}\n"
+        f"Trading Session: {result.get('trading_session', 'unknown').replace('_', ' ').title()}\n"
+    )
+    
+    # Common case: both markets present, fixed shape
+    if "kospi" in result and "kosdaq" in result:
+        return (
+            f"{header}\n{_format_market_line('KOSPI', result['kospi'])}"
+            f"\n{_format_market_line('KOSDAQ', result['kosdaq'])}"
+        )
     
+    lines = [header]
     for market in ["kospi", "kosdaq"]:
         if market in result:
-            data = result[market]
-            market_name = market.upper()
-            current = data.get('current', 0)
-            change = data.get('change', 0)
-            change_rate = data.get('change_rate', 0)
-            
-            direction = "↑" if change > 0 else "↓" if change < 0 else "→"
-            lines.append(f"{market_name}: {current:,.2f} {direction} {change:+,.2f} ({change_rate:+.2f}%)")
+            lines.append(_format_market_line(market.upper(), result[market]))
     
     return "\n".join(lines)
 
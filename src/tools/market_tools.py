@@ -23,7 +23,8 @@ async def get_market_summary(
     Returns:
         Market summary data dictionary
     """
-    cache_key = f"market_summary_{datetime.now().strftime('%Y%m%d_%H%M')}"
+    now = datetime.now()
+    cache_key = f"market_summary_{int(now.timestamp()) // 60}"
     
     summary_data = await cache.get_or_fetch(
         cache_key,
@@ -32,7 +33,7 @@ async def get_market_summary(
     )
     
     return {
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": now.isoformat(),
         "kospi": _parse_market_summary(summary_data.get("kospi", {})),
         "kosdaq": _parse_market_summary(summary_data.get("kosdaq", {}))
     }
@@ -57,7 +58,8 @@ async def get_sector_indices(
     if market not in ["KOSPI", "KOSDAQ"]:
         raise ValueError(f"Invalid market: {market}. Must be KOSPI or KOSDAQ")
     
-    cache_key = f"sector_indices_{market}_{datetime.now().strftime('%Y%m%d_%H%M')}"
+    now = datetime.now()
+    cache_key = f"sector_indices_{market}_{int(now.timestamp()) // 60}"
     
     sector_data = await cache.get_or_fetch(
         cache_key,
@@ -76,7 +78,7 @@ async def get_sector_indices(
     
     result = {
         "market": market,
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": now.isoformat(),
         "sectors": sectors_with_translations
     }
     
@@ -110,14 +112,16 @@ async def get_market_compare(
     if date_to:
         _validate_date_format(date_to)
     
+    now = datetime.now()
+    
     # Use default period if dates not provided
     if not date_from or not date_to:
-        end_date = datetime.now()
+        end_date = now
         start_date = end_date - timedelta(days=7)
         date_from = start_date.strftime("%Y-%m-%d")
         date_to = end_date.strftime("%Y-%m-%d")
     
-    cache_key = f"market_compare_{date_from}_{date_to}_{datetime.now().strftime('%Y%m%d_%H')}"
+    cache_key = f"market_compare_{date_from}_{date_to}_{int(now.timestamp()) // 3600}"
     
     # Mock comparison data for now - would need specific API endpoints
     compare_data = await cache.get_or_fetch(
@@ -2,7 +2,10 @@
 Caching utilities for MCP Market Index Server
 """
 import asyncio
+import heapq
+import sys
 import threading
+import time
 from typing import Dict, Any, Optional, Callable, Awaitable
 from datetime import datetime, timedelta
 from dataclasses import dataclass
@@ -11,11 +14,25 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class CacheEntry:
-    """Cache entry with data and expiration"""
+    """Cache entry with data and expiration (time.monotonic() seconds)"""
     data: Any
-    expires: datetime
+    expires_at: float
+    # Entry may still be served, while refreshing, until this time
+    stale_until: float = 0.0
+    # Approximate payload size in bytes, measured once on insert
+    size: int = 0
+
+
+def estimate_size(data: Any) -> int:
+    """Approximate size in bytes of an object plus its immediate children"""
+    size = sys.getsizeof(data)
+    if isinstance(data, dict):
+        size += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in data.items())
+    elif isinstance(data, (list, tuple)):
+        size += sum(sys.getsizeof(item) for item in data)
+    return size
 
 
 class MarketDataCache:
@@ -25,56 +42,113 @@ class MarketDataCache:
     
     def __init__(self, max_size: int = 1000):
         self._cache: Dict[str, CacheEntry] = {}
-        self._locks: Dict[str, asyncio.Lock] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
         self._max_size = max_size
-        self._cleanup_lock = threading.Lock()
+        self._insert_counter = 0
+        self._memory_usage = 0
+        self._hits = 0
+        self._misses = 0
+        # Reentrant: _cleanup_old_entries calls cleanup_expired while holding it
+        self._cleanup_lock = threading.RLock()
         
     async def get_or_fetch(
         self, 
         key: str, 
         fetch_func: Callable[[], Awaitable[Any]], 
-        ttl: int = 5
+        ttl: int = 5,
+        stale_ttl: int = 0
     ) -> Any:
         """
         Get data from cache or fetch if not available/expired
         
+        Concurrent misses on the same key share a single fetch. Within
+        ``stale_ttl`` seconds after expiry the old data is returned
+        immediately while a refresh runs in the background.
+        
         Args:
             key: Cache key
             fetch_func: Async function to fetch data
             ttl: Time to live in seconds
+            stale_ttl: Seconds past expiry the entry may be served stale
             
         Returns:
             Cached or freshly fetched data
         """
         # Check cache first
-        if key in self._cache:
-            entry = self._cache[key]
-            if entry.expires > datetime.now():
+        entry = self._cache.get(key)
+        if entry is not None:
+            now = time.monotonic()
+            if entry.expires_at > now:
+                self._hits += 1
+                return entry.data
+            if entry.stale_until > now:
+                self._hits += 1
+                self._start_fetch(key, fetch_func, ttl, stale_ttl)
                 return entry.data
         
-        # Get or create lock for this key
-        if key not in self._locks:
-            self._locks[key] = asyncio.Lock()
-            
-        async with self._locks[key]:
-            # Double-check cache after acquiring lock (race condition prevention)
-            if key in self._cache:
-                entry = self._cache[key]
-                if entry.expires > datetime.now():
-                    return entry.data
-            
-            # Fetch new data
-            data = await fetch_func()
+        self._misses += 1
+        task = self._start_fetch(key, fetch_func, ttl, stale_ttl)
+        # Shield so one caller's cancellation does not cancel the shared fetch
+        return await asyncio.shield(task)
+    
+    def _start_fetch(
+        self,
+        key: str,
+        fetch_func: Callable[[], Awaitable[Any]],
+        ttl: int,
+        stale_ttl: int
+    ) -> asyncio.Future:
+        """Return the in-flight fetch for key, starting one if needed"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(
+                self._fetch_and_store(key, fetch_func, ttl, stale_ttl)
+            )
+            self._inflight[key] = task
             
-            # Store in cache
-            expires = datetime.now() + timedelta(seconds=ttl)
-            self._cache[key] = CacheEntry(data=data, expires=expires)
+            def _forget(done: asyncio.Future):
+                if self._inflight.get(key) is done:
+                    del self._inflight[key]
+                # Background refreshes may have no waiter to observe a failure
+                if not done.cancelled() and done.exception() is not None:
+                    logger.debug("Cache fetch for %s failed: %s", key, done.exception())
             
-            # Check if we need to cleanup old entries
-            if len(self._cache) > self._max_size:
-                self._cleanup_old_entries()
+            task.add_done_callback(_forget)
+        return task
+    
+    def is_stale(self, key: str) -> bool:
+        """
+        Check whether an entry is expired but still servable while revalidating
+        
+        Args:
+            key: Cache key
             
-            return data
+        Returns:
+            True if the entry is past its TTL but within its stale window
+        """
+        entry = self._cache.get(key)
+        if entry is None:
+            return False
+        now = time.monotonic()
+        return entry.expires_at <= now < entry.stale_until
+    
+    async def _fetch_and_store(
+        self,
+        key: str,
+        fetch_func: Callable[[], Awaitable[Any]],
+        ttl: int,
+        stale_ttl: int = 0
+    ) -> Any:
+        """Fetch data and store it in the cache"""
+        data = await fetch_func()
+        
+        expires_at = time.monotonic() + ttl
+        self._store(key, CacheEntry(
+            data=data, expires_at=expires_at, stale_until=expires_at + stale_ttl,
+            size=estimate_size(data)
+        ))
+        
+        return data
     
     def get(self, key: str) -> Optional[Any]:
         """
@@ -86,10 +160,26 @@ class MarketDataCache:
         Returns:
             Cached data or None if not found/expired
         """
-        if key in self._cache:
-            entry = self._cache[key]
-            if entry.expires > datetime.now():
-                return entry.data
+        entry = self._cache.get(key)
+        if entry is not None and entry.expires_at > time.monotonic():
+            self._hits += 1
+            return entry.data
+        self._misses += 1
+        return None
+    
+    def peek(self, key: str) -> Optional[Any]:
+        """
+        Get fresh data from cache without counting a hit or miss
+        
+        Args:
+            key: Cache key
+            
+        Returns:
+            Cached data or None if not found/expired
+        """
+        entry = self._cache.get(key)
+        if entry is not None and entry.expires_at > time.monotonic():
+            return entry.data
         return None
     
     def set(self, key: str, data: Any, ttl: int = 5):
@@ -101,12 +191,9 @@ class MarketDataCache:
             data: Data to cache
             ttl: Time to live in seconds
         """
-        expires = datetime.now() + timedelta(seconds=ttl)
-        self._cache[key] = CacheEntry(data=data, expires=expires)
-        
-        # Check if we need to cleanup old entries
-        if len(self._cache) > self._max_size:
-            self._cleanup_old_entries()
+        self._store(key, CacheEntry(
+            data=data, expires_at=time.monotonic() + ttl, size=estimate_size(data)
+        ))
     
     def invalidate(self, key: str = None):
         """
@@ -116,30 +203,59 @@ class MarketDataCache:
             key: Cache key to invalidate, or None for all
         """
         if key:
-            self._cache.pop(key, None)
-            self._locks.pop(key, None)
+            self._discard(key)
         else:
             self._cache.clear()
-            self._locks.clear()
+            self._memory_usage = 0
+            self._hits = 0
+            self._misses = 0
     
     def cleanup_expired(self):
         """Remove expired entries from cache"""
         with self._cleanup_lock:
-            now = datetime.now()
+            now = time.monotonic()
+            # Entries inside their stale window are kept for revalidation
             expired_keys = [
                 key for key, entry in self._cache.items()
-                if entry.expires <= now
+                if entry.expires_at <= now and entry.stale_until <= now
             ]
             
             for key in expired_keys:
-                self._cache.pop(key, None)
-                self._locks.pop(key, None)
+                self._discard(key)
             
-            logger.debug(f"Cleaned up {len(expired_keys)} expired cache entries")
+            logger.debug("Cleaned up %d expired cache entries", len(expired_keys))
+    
+    def _store(self, key: str, entry: CacheEntry):
+        """Insert an entry, keeping the running size estimate in step"""
+        old = self._cache.get(key)
+        if old is not None:
+            self._memory_usage -= old.size
+        self._cache[key] = entry
+        self._memory_usage += entry.size
+        
+        self._maybe_cleanup()
+    
+    def _discard(self, key: str):
+        """Remove an entry, keeping the running size estimate in step"""
+        entry = self._cache.pop(key, None)
+        if entry is not None:
+            self._memory_usage -= entry.size
+    
+    def _maybe_cleanup(self):
+        """Run size cleanup every 64 inserts, or at once past 110% of max_size"""
+        self._insert_counter += 1
+        size = len(self._cache)
+        if size > self._max_size and (
+            self._insert_counter % 64 == 0 or size > self._max_size * 1.1
+        ):
+            self._cleanup_old_entries()
     
     def _cleanup_old_entries(self):
         """Remove old entries to keep cache size under limit"""
-        with self._cleanup_lock:
+        # Another thread is already cleaning; don't block the write path on it
+        if not self._cleanup_lock.acquire(blocking=False):
+            return
+        try:
             if len(self._cache) <= self._max_size:
                 return
             
@@ -148,18 +264,20 @@ class MarketDataCache:
             
             # If still over limit, remove oldest entries
             if len(self._cache) > self._max_size:
-                # Sort by expiration time and remove oldest
-                sorted_items = sorted(
-                    self._cache.items(), 
-                    key=lambda x: x[1].expires
+                # Select only the entries closest to expiry instead of sorting all
+                num_to_remove = len(self._cache) - self._max_size
+                victims = heapq.nsmallest(
+                    num_to_remove,
+                    self._cache.items(),
+                    key=lambda item: item[1].expires_at
                 )
                 
-                num_to_remove = len(self._cache) - self._max_size
-                for key, _ in sorted_items[:num_to_remove]:
-                    self._cache.pop(key, None)
-                    self._locks.pop(key, None)
+                for key, _ in victims:
+                    self._discard(key)
                 
-                logger.debug(f"Removed {num_to_remove} old cache entries to maintain size limit")
+                logger.debug("Removed %d old cache entries to maintain size limit", num_to_remove)
+        finally:
+            self._cleanup_lock.release()
     
     def get_stats(self) -> Dict[str, Any]:
         """
@@ -168,22 +286,24 @@ class MarketDataCache:
         Returns:
             Dictionary with cache stats
         """
-        now = datetime.now()
+        now = time.monotonic()
         total_keys = len(self._cache)
+        # Entries expire with time rather than on an event, so validity needs a scan
         valid_keys = sum(
             1 for entry in self._cache.values()
-            if entry.expires > now
+            if entry.expires_at > now
         )
         expired_keys = total_keys - valid_keys
+        lookups = self._hits + self._misses
         
         return {
             "total_keys": total_keys,
             "valid_keys": valid_keys,
             "expired_keys": expired_keys,
-            "hit_rate": 0.0,  # Would need to track hits/misses
-            "memory_usage": sum(
-                len(str(entry.data)) for entry in self._cache.values()
-            )
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": self._hits / lookups if lookups else 0.0,
+            "memory_usage": self._memory_usage
         }
     
     def get_cache_info(self, key: str) -> Optional[Dict[str, Any]]:
@@ -200,12 +320,12 @@ class MarketDataCache:
             return None
             
         entry = self._cache[key]
-        now = datetime.now()
+        remaining = entry.expires_at - time.monotonic()
         
         return {
             "key": key,
-            "expires": entry.expires.isoformat(),
-            "ttl_remaining": max(0, (entry.expires - now).total_seconds()),
-            "is_expired": entry.expires <= now,
-            "data_size": len(str(entry.data))
+            "expires": (datetime.now() + timedelta(seconds=remaining)).isoformat(),
+            "ttl_remaining": max(0, remaining),
+            "is_expired": remaining <= 0,
+            "data_size": entry.size
         }
\ No newline at end of file
@@ -2,7 +2,9 @@
 Advanced data processing utilities for market data
 """
 from datetime import datetime, time
-from typing import Dict, Any, List, Optional
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
+import math
 import statistics
 
 
@@ -11,70 +13,84 @@ class MarketStatusDetector:
     
     MARKET_OPEN_TIME = time(9, 0)  # 9:00 AM
     MARKET_CLOSE_TIME = time(15, 30)  # 3:30 PM
+    OPENING_SESSION_END = time(10, 0)  # 10:00 AM
+    CLOSING_SESSION_START = time(14, 30)  # 2:30 PM
     
     @classmethod
-    def get_market_status(cls, timestamp: Optional[datetime] = None) -> str:
-        """
-        Determine current market status
-        
-        Returns:
-            str: 'open', 'closed', 'pre_market', 'after_hours'
-        """
+    def _classify(cls, timestamp: Optional[datetime] = None) -> Tuple[str, str]:
+        """Resolve (market status, trading session) from a single clock read"""
         if timestamp is None:
             timestamp = datetime.now()
         
-        current_time = timestamp.time()
-        weekday = timestamp.weekday()
-        
         # Weekend
-        if weekday >= 5:  # Saturday = 5, Sunday = 6
-            return "closed"
+        if timestamp.weekday() >= 5:  # Saturday = 5, Sunday = 6
+            return "closed", "closed"
+        
+        current_time = timestamp.time()
         
         # Weekday time check
         if current_time < cls.MARKET_OPEN_TIME:
-            return "pre_market"
-        elif current_time > cls.MARKET_CLOSE_TIME:
-            return "after_hours"
-        else:
-            return "open"
+            return "pre_market", "pre_market"
+        if current_time > cls.MARKET_CLOSE_TIME:
+            return "after_hours", "after_hours"
+        
+        if current_time < cls.OPENING_SESSION_END:
+            return "open", "opening_session"
+        if current_time > cls.CLOSING_SESSION_START:
+            return "open", "closing_session"
+        return "open", "regular_session"
+    
+    @classmethod
+    def get_market_status(cls, timestamp: Optional[datetime] = None) -> str:
+        """
+        Determine current market status
+        
+        Returns:
+            str: 'open', 'closed', 'pre_market', 'after_hours'
+        """
+        return cls._classify(timestamp)[0]
     
     @classmethod
     def get_trading_session(cls, timestamp: Optional[datetime] = None) -> str:
         """Get detailed trading session info"""
-        status = cls.get_market_status(timestamp)
-        
-        if timestamp is None:
-            timestamp = datetime.now()
-        
-        current_time = timestamp.time()
+        return cls._classify(timestamp)[1]
+    
+    @classmethod
+    @lru_cache(maxsize=4)
+    def status_for_minute(cls, minute_bucket: int) -> Tuple[str, str]:
+        """
+        Get (market status, trading session) for a wall-clock minute
         
-        if status == "open":
-            if current_time < time(10, 0):
-                return "opening_session"
-            elif current_time > time(14, 30):
-                return "closing_session"
-            else:
-                return "regular_session"
+        Session boundaries fall on whole minutes, so the result is constant
+        within a minute and memoized per bucket.
         
-        return status
+        Args:
+            minute_bucket: Epoch seconds // 60
+        """
+        # Evaluate mid-minute so strict boundary comparisons match the whole bucket
+        timestamp = datetime.fromtimestamp(minute_bucket * 60 + 30)
+        return cls._classify(timestamp)
 
 
 class DataFreshnessAnalyzer:
     """Analyze data freshness and quality"""
     
     @classmethod
-    def analyze_freshness(cls, data_timestamp: datetime, cache_hit: bool = False) -> Dict[str, Any]:
+    def analyze_freshness(cls, data_timestamp: datetime, cache_hit: bool = False,
+                          now: Optional[datetime] = None) -> Dict[str, Any]:
         """
         Analyze data freshness
         
         Args:
             data_timestamp: When the data was generated
             cache_hit: Whether data came from cache
+            now: Analysis time, if the caller already has it
             
         Returns:
             Dict with freshness analysis
         """
-        now = datetime.now()
+        if now is None:
+            now = datetime.now()
         age_seconds = (now - data_timestamp).total_seconds()
         
         if cache_hit:
@@ -116,11 +132,10 @@ class DataQualityValidator:
         change = data.get("change", 0)
         change_rate = data.get("change_rate", 0)
         
-        # Check for extreme movements
-        if abs(change_rate) > 5.0:  # >5% change
-            anomalies.append(f"Extreme price movement: {change_rate:.2f}%")
-        
+        # Check for extreme movements; the common small-move case skips both
         if abs(change_rate) > 2.0:  # >2% change
+            if abs(change_rate) > 5.0:  # >5% change
+                anomalies.append(f"Extreme price movement: {change_rate:.2f}%")
             warnings.append(f"Large price movement: {change_rate:.2f}%")
         
         # Check for data consistency
@@ -156,9 +171,9 @@ class TechnicalIndicatorCalculator:
         if len(prices) < 5:
             return {}
         
-        ma5 = statistics.mean(prices[-5:]) if len(prices) >= 5 else None
-        ma10 = statistics.mean(prices[-10:]) if len(prices) >= 10 else None
-        ma20 = statistics.mean(prices[-20:]) if len(prices) >= 20 else None
+        ma5 = sum(prices[-5:]) / 5 if len(prices) >= 5 else None
+        ma10 = sum(prices[-10:]) / 10 if len(prices) >= 10 else None
+        ma20 = sum(prices[-20:]) / 20 if len(prices) >= 20 else None
         
         result = {}
         if ma5 is not None:
@@ -176,7 +191,12 @@ class TechnicalIndicatorCalculator:
         if len(prices) < 2:
             return 0.0
         
-        return round(statistics.stdev(prices), 4)
+        # Two-pass sample standard deviation on floats; statistics.stdev does
+        # exact fraction arithmetic, which is far slower for the same 4 decimals
+        n = len(prices)
+        mean = math.fsum(prices) / n
+        variance = math.fsum((p - mean) ** 2 for p in prices) / (n - 1)
+        return round(math.sqrt(variance), 4)
     
     @classmethod
     def detect_trend(cls, prices: List[float]) -> str:
@@ -206,24 +226,29 @@ class TechnicalIndicatorCalculator:
         if not chart_data:
             return {}
         
-        # Extract prices
-        close_prices = [float(point.get("close", 0)) for point in chart_data]
-        high_prices = [float(point.get("high", 0)) for point in chart_data]
-        low_prices = [float(point.get("low", 0)) for point in chart_data]
-        volumes = [int(point.get("volume", 0)) for point in chart_data]
+        # Extract price columns in a single pass over the points
+        close_prices, high_prices, low_prices, volumes = [], [], [], []
+        for point in chart_data:
+            close_prices.append(float(point.get("close", 0)))
+            high_prices.append(float(point.get("high", 0)))
+            low_prices.append(float(point.get("low", 0)))
+            volumes.append(int(point.get("volume", 0)))
         
         # Calculate indicators
         moving_averages = cls.calculate_moving_averages(close_prices)
         volatility = cls.calculate_volatility(close_prices)
         trend = cls.detect_trend(close_prices)
         
-        # Summary statistics
+        # Summary statistics (chart_data is non-empty, so every column is too)
+        highest = max(high_prices)
+        lowest = min(low_prices)
+        total_volume = sum(volumes)
         summary_stats = {
-            "highest_price": max(high_prices) if high_prices else 0,
-            "lowest_price": min(low_prices) if low_prices else 0,
-            "average_volume": round(statistics.mean(volumes)) if volumes else 0,
-            "total_volume": sum(volumes),
-            "price_range": max(high_prices) - min(low_prices) if high_prices and low_prices else 0
+            "highest_price": highest,
+            "lowest_price": lowest,
+            "average_volume": round(total_volume / len(volumes)),
+            "total_volume": total_volume,
+            "price_range": highest - lowest
         }
         
         return {
@@ -246,46 +271,45 @@ class SectorAnalyzer:
     @classmethod
     def rank_sectors(cls, sectors: List[Dict]) -> List[Dict]:
         """Rank sectors by performance"""
-        # Sort by change_rate (performance)
-        sorted_sectors = sorted(
-            sectors,
-            key=lambda x: float(x.get("change_rate", 0)),
-            reverse=True
-        )
-        
-        # Add rank information
+        return cls._rank_with_rates(sectors, [float(s.get("change_rate", 0)) for s in sectors])
+    
+    @classmethod
+    def _rank_with_rates(cls, sectors: List[Dict], rates: List[float]) -> List[Dict]:
+        """Rank sectors by their already-converted change rates"""
+        # Sort by change_rate (performance); reverse sorting stays stable for ties
+        order = sorted(range(len(sectors)), key=rates.__getitem__, reverse=True)
+        sorted_sectors = [sectors[i] for i in order]
+        
+        # Add rank information; tiers are contiguous thirds of the ranking
+        top_third = len(sorted_sectors) // 3
         for i, sector in enumerate(sorted_sectors):
             sector["rank"] = i + 1
-            sector["performance_tier"] = cls._get_performance_tier(i, len(sorted_sectors))
+            if i < top_third:
+                sector["performance_tier"] = "top_performer"
+            elif i < 2 * top_third:
+                sector["performance_tier"] = "middle_performer"
+            else:
+                sector["performance_tier"] = "underperformer"
         
         return sorted_sectors
     
-    @classmethod
-    def _get_performance_tier(cls, rank: int, total_sectors: int) -> str:
-        """Determine performance tier based on rank"""
-        top_third = total_sectors // 3
-        if rank < top_third:
-            return "top_performer"
-        elif rank < 2 * top_third:
-            return "middle_performer"
-        else:
-            return "underperformer"
-    
     @classmethod
     def analyze_sector_performance(cls, sectors: List[Dict]) -> Dict[str, Any]:
         """Comprehensive sector performance analysis"""
         if not sectors:
             return {}
         
-        ranked_sectors = cls.rank_sectors(sectors)
+        # Convert change rates once for both the ranking and the average
+        change_rates = [float(s.get("change_rate", 0)) for s in sectors]
+        ranked_sectors = cls._rank_with_rates(sectors, change_rates)
         
-        # Get top and worst performers
-        top_performers = [s for s in ranked_sectors if s.get("performance_tier") == "top_performer"]
-        worst_performers = [s for s in ranked_sectors if s.get("performance_tier") == "underperformer"]
+        # Get top and worst performers: the ranking is sorted, so each tier is a slice
+        top_third = len(ranked_sectors) // 3
+        top_performers = ranked_sectors[:top_third]
+        worst_performers = ranked_sectors[2 * top_third:]
         
         # Calculate statistics
-        change_rates = [float(s.get("change_rate", 0)) for s in sectors]
-        avg_performance = statistics.mean(change_rates) if change_rates else 0
+        avg_performance = statistics.mean(change_rates)
         
         return {
             "performance_ranking": ranked_sectors,
@@ -303,57 +327,37 @@ class SectorAnalyzer:
 class LocalizationHelper:
     """Handle multi-language support"""
     
-    SECTOR_TRANSLATIONS = {
-        "반도체": {"en": "Semiconductors", "kr": "반도체"},
-        "은행": {"en": "Banking", "kr": "은행"},
-        "화학": {"en": "Chemicals", "kr": "화학"},
-        "철강": {"en": "Steel", "kr": "철강"},
-        "자동차": {"en": "Automotive", "kr": "자동차"},
-        "건설": {"en": "Construction", "kr": "건설"},
-        "조선": {"en": "Shipbuilding", "kr": "조선"},
-        "기계": {"en": "Machinery", "kr": "기계"},
-        "전기전자": {"en": "Electronics", "kr": "전기전자"},
-        "IT": {"en": "Information Technology", "kr": "정보기술"},
-        "바이오": {"en": "Biotechnology", "kr": "바이오"},
-        "게임": {"en": "Gaming", "kr": "게임"},
-        "소프트웨어": {"en": "Software", "kr": "소프트웨어"},
-        "통신": {"en": "Telecommunications", "kr": "통신"}
+    # Korean sector name -> (English name, description)
+    SECTOR_INFO = {
+        "반도체": ("Semiconductors", "Technology sector focusing on semiconductor manufacturing and design"),
+        "은행": ("Banking", "Financial services sector including commercial and investment banking"),
+        "화학": ("Chemicals", "Chemical industry including petrochemicals and specialty chemicals"),
+        "철강": ("Steel", "Steel and metal production industry"),
+        "자동차": ("Automotive", "Automotive manufacturing and related components"),
+        "건설": ("Construction", "Construction and real estate development"),
+        "조선": ("Shipbuilding", "Shipbuilding and marine engineering"),
+        "기계": ("Machinery", "Industrial machinery and equipment manufacturing"),
+        "전기전자": ("Electronics", "Electronics and electrical equipment industry"),
+        "IT": ("Information Technology", "Information technology and software services"),
+        "바이오": ("Biotechnology", "Biotechnology and pharmaceutical industry"),
+        "게임": ("Gaming", "Gaming and entertainment software"),
+        "소프트웨어": ("Software", "Software development and IT services"),
+        "통신": ("Telecommunications", "Telecommunications and network services")
     }
     
     @classmethod
     def add_translations(cls, sectors: List[Dict]) -> List[Dict]:
         """Add multi-language names to sectors"""
+        info = cls.SECTOR_INFO
         for sector in sectors:
             name_kr = sector.get("name", "")
-            translation = cls.SECTOR_TRANSLATIONS.get(name_kr, {})
+            name_en, description = info.get(name_kr, (name_kr, "Market sector"))
             
             sector["name_kr"] = name_kr
-            sector["name_en"] = translation.get("en", name_kr)
-            sector["description"] = cls._get_sector_description(name_kr)
+            sector["name_en"] = name_en
+            sector["description"] = description
         
         return sectors
-    
-    @classmethod
-    def _get_sector_description(cls, sector_name: str) -> str:
-        """Get sector description"""
-        descriptions = {
-            "반도체": "Technology sector focusing on semiconductor manufacturing and design",
-            "은행": "Financial services sector including commercial and investment banking",
-            "화학": "Chemical industry including petrochemicals and specialty chemicals",
-            "철강": "Steel and metal production industry",
-            "자동차": "Automotive manufacturing and related components",
-            "건설": "Construction and real estate development",
-            "조선": "Shipbuilding and marine engineering",
-            "기계": "Industrial machinery and equipment manufacturing",
-            "전기전자": "Electronics and electrical equipment industry",
-            "IT": "Information technology and software services",
-            "바이오": "Biotechnology and pharmaceutical industry",
-            "게임": "Gaming and entertainment software",
-            "소프트웨어": "Software development and IT services",
-            "통신": "Telecommunications and network services"
-        }
-        
-        return descriptions.get(sector_name, "Market sector")
 
 
 class PerformanceTracker:
@@ -361,9 +365,16 @@ class PerformanceTracker:
     
     @classmethod
     def create_performance_metrics(cls, start_time: datetime, end_time: datetime, 
-                                 data_points: int = 0, cache_hits: int = 0) -> Dict[str, Any]:
-        """Create performance metrics"""
-        execution_time = (end_time - start_time).total_seconds()
+                                 data_points: int = 0, cache_hits: int = 0,
+                                 execution_time: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Create performance metrics
+        
+        execution_time, when given, should come from a monotonic clock; otherwise
+        it is derived from the wall-clock start and end times.
+        """
+        if execution_time is None:
+            execution_time = (end_time - start_time).total_seconds()
         
         return {
             "execution_time": round(execution_time, 3),
@@ -4,14 +4,16 @@ Logging utilities for MCP Market Index Server
 import logging
 import logging.handlers
 import sys
-import json
 import os
-import threading
+import time
 from pathlib import Path
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any, Union
 from enum import Enum
 from contextlib import contextmanager
+from contextvars import ContextVar
+
+import orjson
 
 
 def setup_logger(name: str, level: str = "INFO") -> logging.Logger:
@@ -66,6 +68,8 @@ class StructuredLogger:
     
     def log_api_call(self, endpoint: str, params: dict, response_time: float, status_code: Optional[int] = None):
         """Log API call with structured data"""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
         self.logger.info(
             f"API_CALL endpoint={endpoint} params={params} "
             f"response_time={response_time:.3f}s status_code={status_code}"
@@ -73,19 +77,27 @@ class StructuredLogger:
     
     def log_cache_hit(self, key: str, ttl_remaining: float):
         """Log cache hit"""
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return
         self.logger.debug(f"CACHE_HIT key={key} ttl_remaining={ttl_remaining:.1f}s")
     
     def log_cache_miss(self, key: str):
         """Log cache miss"""
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return
         self.logger.debug(f"CACHE_MISS key={key}")
     
     def log_error(self, error: Exception, context: dict = None):
         """Log error with context"""
+        if not self.logger.isEnabledFor(logging.ERROR):
+            return
         context_str = f" context={context}" if context else ""
         self.logger.error(f"ERROR {type(error).__name__}: {str(error)}{context_str}")
     
     def log_performance(self, operation: str, duration: float, metadata: dict = None):
         """Log performance metrics"""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
         metadata_str = f" metadata={metadata}" if metadata else ""
         self.logger.info(f"PERFORMANCE operation={operation} duration={duration:.3f}s{metadata_str}")
 
@@ -99,13 +111,24 @@ class LogLevel(Enum):
     CRITICAL = "CRITICAL"
 
 
+# Standard LogRecord attributes; anything else on a record is an extra field
+_RESERVED_LOG_ATTRS = frozenset({
+    'name', 'msg', 'args', 'levelname', 'levelno', 'pathname',
+    'filename', 'module', 'lineno', 'funcName', 'created',
+    'msecs', 'relativeCreated', 'thread', 'threadName',
+    'processName', 'process', 'exc_info', 'exc_text', 'stack_info',
+    'message', 'asctime', 'taskName'
+})
+
+
 class LogFormatter(logging.Formatter):
     """Structured JSON log formatter"""
     
     def format(self, record: logging.LogRecord) -> str:
         """Format log record as structured JSON"""
         log_data = {
-            "timestamp": datetime.fromtimestamp(record.created).isoformat(),
+            # orjson renders datetimes in isoformat() form
+            "timestamp": datetime.fromtimestamp(record.created),
             "level": record.levelname,
             "logger": record.name,
             "message": record.getMessage(),
@@ -121,15 +144,10 @@ class LogFormatter(logging.Formatter):
             log_data["exception"] = self.formatException(record.exc_info)
         
         # Add extra fields from record
-        extra_fields = {}
-        for key, value in record.__dict__.items():
-            if key not in [
-                'name', 'msg', 'args', 'levelname', 'levelno', 'pathname', 
-                'filename', 'module', 'lineno', 'funcName', 'created', 
-                'msecs', 'relativeCreated', 'thread', 'threadName',
-                'processName', 'process', 'exc_info', 'exc_text', 'stack_info'
-            ]:
-                extra_fields[key] = value
+        extra_fields = {
+            key: value for key, value in record.__dict__.items()
+            if key not in _RESERVED_LOG_ATTRS
+        }
         
         if extra_fields:
             log_data.update(extra_fields)
@@ -138,7 +156,7 @@ class LogFormatter(logging.Formatter):
         if hasattr(record, 'exc_text') and record.exc_text:
             log_data["traceback"] = record.exc_text
         
-        return json.dumps(log_data, ensure_ascii=False)
+        return orjson.dumps(log_data, option=orjson.OPT_NON_STR_KEYS).decode()
 
 
 class FileRotationHandler(logging.handlers.RotatingFileHandler):
@@ -150,6 +168,7 @@ class FileRotationHandler(logging.handlers.RotatingFileHandler):
         self.max_files = max_files
         self.rotation_interval = rotation_interval
         self.last_rotation = datetime.now()
+        self._next_rotation_epoch = self._next_rotation_after(self.last_rotation)
         
         super().__init__(
             filename=file_path,
@@ -157,6 +176,16 @@ class FileRotationHandler(logging.handlers.RotatingFileHandler):
             backupCount=max_files
         )
     
+    def _next_rotation_after(self, moment: datetime) -> float:
+        """Epoch seconds of the next time-based rotation boundary after moment"""
+        if self.rotation_interval == "daily":
+            boundary = moment.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        elif self.rotation_interval == "hourly":
+            boundary = moment.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        else:
+            return float("inf")
+        return boundary.timestamp()
+    
     def should_rotate(self) -> bool:
         """Check if rotation should occur"""
         # Size-based rotation
@@ -164,43 +193,44 @@ class FileRotationHandler(logging.handlers.RotatingFileHandler):
             return True
         
         # Time-based rotation
-        if self.rotation_interval:
-            now = datetime.now()
-            if self.rotation_interval == "daily":
-                return now.date() > self.last_rotation.date()
-            elif self.rotation_interval == "hourly":
-                return now.hour != self.last_rotation.hour
-        
-        return False
+        return time.time() >= self._next_rotation_epoch
+    
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        """Per-record check: a float compare for time, then the base size check"""
+        if record.created >= self._next_rotation_epoch:
+            return True
+        return super().shouldRollover(record)
+    
+    def doRollover(self):
+        """Rotate files and schedule the next time-based rotation"""
+        super().doRollover()
+        self.last_rotation = datetime.now()
+        self._next_rotation_epoch = self._next_rotation_after(self.last_rotation)
     
     def do_rotate(self):
         """Perform rotation"""
         if self.should_rotate():
-            super().doRollover()
-            self.last_rotation = datetime.now()
-    
-    def emit(self, record: logging.LogRecord):
-        """Emit log record with rotation check"""
-        try:
-            self.do_rotate()
-            super().emit(record)
-        except Exception:
-            self.handleError(record)
+            self.doRollover()
     
     def cleanup_old_files(self):
         """Clean up old log files beyond max_files"""
-        log_dir = Path(self.baseFilename).parent
+        log_dir = os.path.dirname(self.baseFilename)
         log_name = Path(self.baseFilename).stem
         
         # Find all rotated log files
-        log_files = list(log_dir.glob(f"{log_name}*"))
+        with os.scandir(log_dir) as it:
+            log_files = [
+                (entry.stat().st_ctime, entry.path)
+                for entry in it
+                if entry.name.startswith(log_name)
+            ]
         
         # Sort by creation time and keep only max_files
-        log_files.sort(key=lambda x: x.stat().st_ctime, reverse=True)
+        log_files.sort(reverse=True)
         
-        for old_file in log_files[self.max_files:]:
+        for _, old_path in log_files[self.max_files:]:
             try:
-                old_file.unlink()
+                os.unlink(old_path)
             except OSError:
                 pass
 
@@ -271,6 +301,13 @@ class LogConfig:
         return config
 
 
+# Log context shared by all structured loggers; follows asyncio tasks across awaits
+_LOG_CONTEXT: ContextVar[Dict[str, Any]] = ContextVar("log_context", default={})
+
+# Logger name -> configuration its handlers were last built for
+_CONFIGURED_LOGGERS: Dict[str, tuple] = {}
+
+
 class StructuredLogger:
     """Enhanced structured logging helper"""
     
@@ -278,13 +315,24 @@ class StructuredLogger:
         self.name = name
         self.config = config or LogConfig()
         self.logger = logging.getLogger(name)
-        self._context_storage = threading.local()
         
         self._setup_logger()
     
     def _setup_logger(self):
         """Setup logger with handlers"""
+        config = self.config
+        setup_key = (
+            config.level.value, config.format_type, config.console_handler_enabled,
+            config.file_handler_enabled, config.file_path, config.max_size_mb,
+            config.max_files, config.rotation_interval
+        )
+        # Same name, same config: keep the existing handlers and open files
+        if _CONFIGURED_LOGGERS.get(self.name) == setup_key and self.logger.handlers:
+            return
+        
         self.logger.setLevel(getattr(logging, self.config.level.value))
+        for handler in self.logger.handlers:
+            handler.close()
         self.logger.handlers.clear()
         
         # Setup handlers based on config
@@ -293,6 +341,8 @@ class StructuredLogger:
         
         if self.config.file_handler_enabled:
             self._add_file_handler()
+        
+        _CONFIGURED_LOGGERS[self.name] = setup_key
     
     def _add_console_handler(self):
         """Add console handler"""
@@ -325,21 +375,22 @@ class StructuredLogger:
     @contextmanager
     def context(self, **context_data):
         """Context manager for adding context to logs"""
-        old_context = getattr(self._context_storage, 'context', {})
-        new_context = {**old_context, **context_data}
-        self._context_storage.context = new_context
+        token = _LOG_CONTEXT.set({**_LOG_CONTEXT.get(), **context_data})
         
         try:
             yield
         finally:
-            self._context_storage.context = old_context
+            _LOG_CONTEXT.reset(token)
     
     def _get_context(self) -> Dict[str, Any]:
         """Get current context"""
-        return getattr(self._context_storage, 'context', {})
+        return _LOG_CONTEXT.get()
     
     def _log_with_context(self, level: int, message: str, **extra):
         """Log message with context"""
+        # Skip merging context for records the level would drop anyway
+        if not self.logger.isEnabledFor(level):
+            return
         context = self._get_context()
         all_extra = {**context, **extra}
         self.logger.log(level, message, extra=all_extra)
@@ -3,72 +3,164 @@ Metrics collection and performance monitoring
 메트릭 수집 및 성능 모니터링
 """
 
+import sys
 import time
 import asyncio
 import threading
-from typing import Dict, Any, List, Optional
+import itertools
+from array import array
+from typing import Dict, Any, Iterable, List, Optional, Tuple
 from dataclasses import dataclass, field
 from contextlib import asynccontextmanager
-from collections import defaultdict, deque
+from collections import OrderedDict, deque
 import psutil
 import gc
 import logging
 
 logger = logging.getLogger(__name__)
 
+_BYTES_TO_MB = 1.0 / (1024 * 1024)
 
-@dataclass
+
+RESPONSE_TIME_WINDOW = 1000
+ERROR_TYPES_LIMIT = 256
+
+
+@dataclass(slots=True)
 class OperationMetrics:
-    """Metrics for a specific operation"""
+    """Metrics for a specific operation, accumulated in integer nanoseconds"""
     total_calls: int = 0
-    total_time: float = 0.0
-    min_response_time: float = float('inf')
-    max_response_time: float = 0.0
-    response_times: deque = field(default_factory=lambda: deque(maxlen=1000))
+    total_time_ns: int = 0
+    min_response_time_ns: int = sys.maxsize
+    max_response_time_ns: int = 0
+    # Ring buffer of the most recent samples: flat int64 storage, no boxed values
+    _rt_buf: array = field(
+        default_factory=lambda: array('q', bytes(8 * RESPONSE_TIME_WINDOW)), repr=False
+    )
+    _rt_idx: int = field(default=0, repr=False)
     
     @property
     def average_response_time(self) -> float:
+        """Average response time in seconds"""
         if self.total_calls == 0:
             return 0.0
-        return self.total_time / self.total_calls
+        return self.total_time_ns / self.total_calls / 1e9
     
-    def record_time(self, duration: float):
-        """Record a timing measurement"""
+    @property
+    def response_times(self) -> array:
+        """Most recent samples in nanoseconds, oldest first"""
+        if self._rt_idx <= RESPONSE_TIME_WINDOW:
+            return self._rt_buf[:self._rt_idx]
+        split = self._rt_idx % RESPONSE_TIME_WINDOW
+        return self._rt_buf[split:] + self._rt_buf[:split]
+    
+    def _append_sample(self, duration_ns: int):
+        self._rt_buf[self._rt_idx % RESPONSE_TIME_WINDOW] = duration_ns
+        self._rt_idx += 1
+    
+    def record_time(self, duration_ns: int):
+        """Record a timing measurement in nanoseconds"""
         self.total_calls += 1
-        self.total_time += duration
-        self.min_response_time = min(self.min_response_time, duration)
-        self.max_response_time = max(self.max_response_time, duration)
-        self.response_times.append(duration)
+        self.total_time_ns += duration_ns
+        if duration_ns < self.min_response_time_ns:
+            self.min_response_time_ns = duration_ns
+        if duration_ns > self.max_response_time_ns:
+            self.max_response_time_ns = duration_ns
+        self._append_sample(duration_ns)
+    
+    def merge(self, other: "OperationMetrics", samples: bool = True):
+        """
+        Fold another shard's measurements into this one
+        
+        Args:
+            other: Shard to fold in
+            samples: Also replay its response time ring; skip when only the
+                totals and min/max are read
+        """
+        self.total_calls += other.total_calls
+        self.total_time_ns += other.total_time_ns
+        self.min_response_time_ns = min(self.min_response_time_ns, other.min_response_time_ns)
+        self.max_response_time_ns = max(self.max_response_time_ns, other.max_response_time_ns)
+        if samples:
+            for duration_ns in other.response_times:
+                self._append_sample(duration_ns)
 
 
-@dataclass
+@dataclass(slots=True)
 class CacheMetrics:
-    """Cache operation metrics"""
-    hits: int = 0
-    misses: int = 0
+    """
+    Cache operation metrics
+    
+    Each thread counts into its own [hits, misses] shard, so recording takes
+    no lock; shards are summed on read, like the operation timing shards.
+    """
+    _local: threading.local = field(default_factory=threading.local, repr=False)
+    _shards: List[List[int]] = field(default_factory=list, repr=False)
+    _registry_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    
+    def _counts(self) -> List[int]:
+        """Get the calling thread's [hits, misses], registering it on first use"""
+        try:
+            return self._local.counts
+        except AttributeError:
+            counts = self._local.counts = [0, 0]
+            # Shards stay registered after their thread exits so no counts are lost
+            with self._registry_lock:
+                self._shards.append(counts)
+            return counts
+    
+    def record_hit(self):
+        """Record a cache hit"""
+        self._counts()[0] += 1
+    
+    def record_miss(self):
+        """Record a cache miss"""
+        self._counts()[1] += 1
+    
+    def snapshot(self) -> Tuple[int, int]:
+        """Get (hits, misses) summed across thread shards"""
+        with self._registry_lock:
+            shards = list(self._shards)
+        hits = misses = 0
+        for shard_hits, shard_misses in shards:
+            hits += shard_hits
+            misses += shard_misses
+        return hits, misses
+    
+    @property
+    def hits(self) -> int:
+        return self.snapshot()[0]
+    
+    @property
+    def misses(self) -> int:
+        return self.snapshot()[1]
     
     @property
     def total_requests(self) -> int:
-        return self.hits + self.misses
+        hits, misses = self.snapshot()
+        return hits + misses
     
     @property
     def hit_rate(self) -> float:
-        if self.total_requests == 0:
+        hits, misses = self.snapshot()
+        total = hits + misses
+        if total == 0:
             return 0.0
-        return self.hits / self.total_requests
+        return hits / total
     
     @property
     def miss_rate(self) -> float:
         return 1.0 - self.hit_rate
 
 
-@dataclass
+@dataclass(slots=True)
 class ErrorMetrics:
     """Error tracking metrics"""
     total_operations: int = 0
     successful_operations: int = 0
     failed_operations: int = 0
-    error_types: Dict[str, int] = field(default_factory=dict)
+    # Most recently seen error types, capped so distinct messages can't grow it unbounded
+    error_types: "OrderedDict[str, int]" = field(default_factory=OrderedDict)
     
     @property
     def success_rate(self) -> float:
@@ -89,92 +181,160 @@ class ErrorMetrics:
         """Record failed operation"""
         self.total_operations += 1
         self.failed_operations += 1
-        self.error_types[error_type] = self.error_types.get(error_type, 0) + 1
+        
+        error_types = self.error_types
+        count = error_types.get(error_type)
+        if count is None:
+            error_types[error_type] = 1
+            if len(error_types) > ERROR_TYPES_LIMIT:
+                error_types.popitem(last=False)
+        else:
+            error_types[error_type] = count + 1
+            error_types.move_to_end(error_type)
 
 
 class MetricsCollector:
     """Collect and manage application metrics"""
     
-    def __init__(self):
-        self.operation_metrics: Dict[str, OperationMetrics] = defaultdict(OperationMetrics)
+    def __init__(self, operations: Iterable[str] = ()):
+        """
+        Args:
+            operations: Known operation names to register up front, so their
+                first timing or error record skips the registration slow path
+        """
+        # Operation timings are sharded per thread and merged on read; each
+        # error entry carries its own lock so recorders only contend per operation
+        self._operations = tuple(operations)
+        self._local = threading.local()
+        self._shards: List[Dict[str, OperationMetrics]] = []
         self.cache_metrics = CacheMetrics()
-        self.error_metrics: Dict[str, ErrorMetrics] = defaultdict(ErrorMetrics)
-        self._lock = threading.Lock()
+        self.error_metrics: Dict[str, Tuple[ErrorMetrics, threading.Lock]] = {
+            name: (ErrorMetrics(), threading.Lock()) for name in self._operations
+        }
+        self._registry_lock = threading.Lock()
+    
+    def _entry(self, registry: Dict[str, tuple], name: str, factory) -> tuple:
+        """Get a (metrics, lock) entry, creating it under the registry lock on first use"""
+        entry = registry.get(name)
+        if entry is None:
+            with self._registry_lock:
+                entry = registry.get(name)
+                if entry is None:
+                    entry = registry[name] = (factory(), threading.Lock())
+        return entry
+    
+    def _shard(self) -> Dict[str, OperationMetrics]:
+        """Get the calling thread's operation metrics, registering it on first use"""
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {name: OperationMetrics() for name in self._operations}
+            # Shards stay registered after their thread exits so no timings are lost
+            with self._registry_lock:
+                self._shards.append(shard)
+            return shard
+    
+    def _merged(self, operation_name: str, samples: bool = False) -> OperationMetrics:
+        """Merge an operation's metrics across all thread shards; samples only on request"""
+        with self._registry_lock:
+            shards = list(self._shards)
+        
+        merged = OperationMetrics()
+        for shard in shards:
+            metrics = shard.get(operation_name)
+            if metrics is not None:
+                merged.merge(metrics, samples=samples)
+        return merged
     
     @asynccontextmanager
     async def time_operation(self, operation_name: str):
         """Context manager for timing operations"""
-        start_time = time.time()
+        shard = self._shard()
+        metrics = shard.get(operation_name)
+        if metrics is None:
+            metrics = shard[operation_name] = OperationMetrics()
+        start_ns = time.perf_counter_ns()
         try:
             yield
         finally:
-            duration = time.time() - start_time
-            with self._lock:
-                self.operation_metrics[operation_name].record_time(duration)
+            metrics.record_time(time.perf_counter_ns() - start_ns)
     
     def get_metrics(self, operation_name: str) -> Dict[str, Any]:
         """Get metrics for a specific operation"""
-        with self._lock:
-            metrics = self.operation_metrics[operation_name]
-            return {
-                "total_calls": metrics.total_calls,
-                "average_response_time": metrics.average_response_time,
-                "min_response_time": metrics.min_response_time if metrics.min_response_time != float('inf') else 0.0,
-                "max_response_time": metrics.max_response_time
-            }
+        metrics = self._merged(operation_name)
+        return {
+            "total_calls": metrics.total_calls,
+            "average_response_time": metrics.average_response_time,
+            "min_response_time": metrics.min_response_time_ns / 1e9 if metrics.total_calls else 0.0,
+            "max_response_time": metrics.max_response_time_ns / 1e9
+        }
     
     def record_cache_hit(self, key: str):
         """Record cache hit"""
-        with self._lock:
-            self.cache_metrics.hits += 1
+        self.cache_metrics.record_hit()
     
     def record_cache_miss(self, key: str):
         """Record cache miss"""
-        with self._lock:
-            self.cache_metrics.misses += 1
+        self.cache_metrics.record_miss()
     
     def get_cache_metrics(self) -> Dict[str, Any]:
         """Get cache metrics"""
-        with self._lock:
-            return {
-                "total_requests": self.cache_metrics.total_requests,
-                "hits": self.cache_metrics.hits,
-                "misses": self.cache_metrics.misses,
-                "hit_rate": self.cache_metrics.hit_rate,
-                "miss_rate": self.cache_metrics.miss_rate
-            }
+        hits, misses = self.cache_metrics.snapshot()
+        total = hits + misses
+        hit_rate = hits / total if total else 0.0
+        return {
+            "total_requests": total,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hit_rate,
+            "miss_rate": 1.0 - hit_rate
+        }
     
     def record_operation_success(self, operation_name: str):
         """Record successful operation"""
-        with self._lock:
-            self.error_metrics[operation_name].record_success()
+        metrics, lock = self._entry(self.error_metrics, operation_name, ErrorMetrics)
+        with lock:
+            metrics.record_success()
     
     def record_operation_failure(self, operation_name: str, error_type: str):
         """Record failed operation"""
-        with self._lock:
-            self.error_metrics[operation_name].record_failure(error_type)
+        metrics, lock = self._entry(self.error_metrics, operation_name, ErrorMetrics)
+        with lock:
+            metrics.record_failure(error_type)
     
     def get_error_metrics(self, operation_name: str) -> Dict[str, Any]:
         """Get error metrics for operation"""
-        with self._lock:
-            metrics = self.error_metrics[operation_name]
-            return {
-                "total_operations": metrics.total_operations,
-                "successful_operations": metrics.successful_operations,
-                "failed_operations": metrics.failed_operations,
-                "success_rate": metrics.success_rate,
-                "error_rate": metrics.error_rate,
-                "error_types": dict(metrics.error_types)
-            }
+        metrics, lock = self._entry(self.error_metrics, operation_name, ErrorMetrics)
+        # Snapshot under the entry lock; derive and format after releasing it
+        with lock:
+            total = metrics.total_operations
+            successful = metrics.successful_operations
+            failed = metrics.failed_operations
+            error_types = dict(metrics.error_types)
+        
+        success_rate = successful / total if total else 0.0
+        return {
+            "total_operations": total,
+            "successful_operations": successful,
+            "failed_operations": failed,
+            "success_rate": success_rate,
+            "error_rate": 1.0 - success_rate,
+            "error_types": error_types
+        }
     
     def get_all_metrics(self) -> Dict[str, Any]:
         """Get all collected metrics"""
-        with self._lock:
-            return {
-                "operations": {name: self.get_metrics(name) for name in self.operation_metrics},
-                "cache": self.get_cache_metrics(),
-                "errors": {name: self.get_error_metrics(name) for name in self.error_metrics}
-            }
+        with self._registry_lock:
+            operation_names = list(dict.fromkeys(itertools.chain(
+                self._operations, *(list(shard) for shard in self._shards)
+            )))
+            error_names = list(self.error_metrics)
+        
+        return {
+            "operations": {name: self.get_metrics(name) for name in operation_names},
+            "cache": self.get_cache_metrics(),
+            "errors": {name: self.get_error_metrics(name) for name in error_names}
+        }
 
 
 class PerformanceMonitor:
@@ -190,11 +350,16 @@ class PerformanceMonitor:
         self.peak_memory_mb = 0.0
         self.memory_history: deque = deque(maxlen=100)
         
+        # CPU tracking, sampled once per tick so the percentage spans one interval
+        self.current_cpu_percent = 0.0
+        self._has_sample = False
+        
         # Concurrency tracking
         self.current_concurrent_requests = 0
         self.peak_concurrent_requests = 0
         self.concurrency_history: deque = deque(maxlen=100)
         
+        self._process = psutil.Process()
         self._lock = threading.Lock()
     
     def start_monitoring(self):
@@ -211,25 +376,38 @@ class PerformanceMonitor:
     
     async def _monitor_loop(self):
         """Background monitoring loop"""
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
         while self.is_monitoring:
             try:
-                # Monitor memory usage
-                process = psutil.Process()
-                memory_info = process.memory_info()
-                memory_mb = memory_info.rss / 1024 / 1024
+                # Monitor memory and CPU usage
+                process = self._process
+                with process.oneshot():
+                    memory_mb = process.memory_info().rss * _BYTES_TO_MB
+                    cpu_percent = process.cpu_percent()
                 
                 with self._lock:
+                    self.current_cpu_percent = cpu_percent
                     self.current_memory_mb = memory_mb
+                    self._has_sample = True
                     self.peak_memory_mb = max(self.peak_memory_mb, memory_mb)
                     self.memory_history.append(memory_mb)
                 
-                await asyncio.sleep(self.monitoring_interval)
-                
+            except Exception as e:
+                logger.error("Error in monitoring loop: %s", e)
+            
+            # Sleep to a fixed deadline so sampling time doesn't accumulate as drift
+            now = loop.time()
+            next_tick += self.monitoring_interval
+            if next_tick <= now:
+                logger.warning("Monitoring loop fell %.3fs behind; skipping missed ticks",
+                               now - next_tick)
+                next_tick = now + self.monitoring_interval
+            
+            try:
+                await asyncio.sleep(next_tick - now)
             except asyncio.CancelledError:
                 break
-            except Exception as e:
-                logger.error(f"Error in monitoring loop: {e}")
-                await asyncio.sleep(self.monitoring_interval)
     
     def get_memory_metrics(self) -> Dict[str, Any]:
         """Get memory usage metrics"""
@@ -240,6 +418,13 @@ class PerformanceMonitor:
                 "memory_history": list(self.memory_history)
             }
     
+    def latest_sample(self) -> Optional[Tuple[float, float]]:
+        """Get the most recent (memory MB, CPU percent) sample, or None if not running or not sampled yet"""
+        with self._lock:
+            if not self.is_monitoring or not self._has_sample:
+                return None
+            return self.current_memory_mb, self.current_cpu_percent
+    
     def track_concurrent_request(self):
         """Context manager for tracking concurrent requests"""
         return ConcurrentRequestTracker(self)
@@ -300,21 +485,35 @@ class ConcurrentRequestTracker:
 class ResourceMonitor:
     """Monitor system resources and trigger alerts"""
     
-    def __init__(self, memory_threshold_mb: float = 500.0, cpu_threshold_percent: float = 80.0):
+    def __init__(self, memory_threshold_mb: float = 500.0, cpu_threshold_percent: float = 80.0,
+                 performance_monitor: Optional[PerformanceMonitor] = None):
+        """
+        Args:
+            performance_monitor: Monitor whose per-tick samples to check; without
+                one, or while it is stopped or has no sample yet, the process is
+                sampled on each check
+        """
         self.memory_threshold_mb = memory_threshold_mb
         self.cpu_threshold_percent = cpu_threshold_percent
+        self.performance_monitor = performance_monitor
         self.alerts: List[Dict[str, Any]] = []
+        self._process = psutil.Process()
     
     def check_resources(self) -> Dict[str, Any]:
         """Check current resource usage"""
-        process = psutil.Process()
-        
-        # Memory check
-        memory_info = process.memory_info()
-        memory_mb = memory_info.rss / 1024 / 1024
+        sample = None
+        if self.performance_monitor is not None:
+            sample = self.performance_monitor.latest_sample()
         
-        # CPU check
-        cpu_percent = process.cpu_percent()
+        if sample is not None:
+            memory_mb, cpu_percent = sample
+        else:
+            process = self._process
+            
+            # Read memory and CPU in one pass over the process' /proc entries
+            with process.oneshot():
+                memory_mb = process.memory_info().rss * _BYTES_TO_MB
+                cpu_percent = process.cpu_percent()
         
         # Check thresholds
         alerts = []
@@ -4,11 +4,14 @@ Monitoring and alerting system
 """
 
 import asyncio
+import bisect
+import math
 import time
 import psutil
+import itertools
 import threading
 from typing import Dict, Any, List, Optional, Callable
-from datetime import datetime, timedelta
+from datetime import datetime
 from dataclasses import dataclass, field
 from collections import deque, defaultdict
 from enum import Enum
@@ -16,6 +19,76 @@ from enum import Enum
 from .logger import StructuredLogger, create_logger
 from .metrics import MetricsCollector, PerformanceMonitor
 
+_BYTES_TO_MB = 1.0 / (1024 * 1024)
+_BYTES_TO_GB = 1.0 / (1024 * 1024 * 1024)
+
+
+class _PsutilCache:
+    """
+    Share system-wide psutil samples between health checks, dashboards and
+    the metrics logger, refreshing at most once per TTL
+    """
+    
+    def __init__(self):
+        self._sampled_at = float("-inf")
+        self._sample: Optional[tuple] = None
+        # Health checks sample from worker threads; one refresh at a time
+        self._lock = threading.Lock()
+        # Prime psutil's CPU baseline; readings are only taken a TTL after it
+        psutil.cpu_percent(interval=None)
+        self._primed_at = time.monotonic()
+    
+    def sample(self, ttl: float = 1.0) -> tuple:
+        """Get (virtual memory, CPU percent or None, root disk usage)"""
+        with self._lock:
+            # Staleness is checked under the lock, so a thread that waited on
+            # another's refresh reuses it instead of reading CPU again at once
+            now = time.monotonic()
+            if self._sample is None or now - self._sampled_at > ttl:
+                # Non-blocking CPU read: the percentage since the previous read.
+                # Within a TTL of the prime that spans next to no time, so report
+                # None and leave the baseline in place for the next refresh
+                cpu_percent = None
+                if now - self._primed_at >= ttl:
+                    cpu_percent = psutil.cpu_percent(interval=None)
+                self._sample = (
+                    psutil.virtual_memory(),
+                    cpu_percent,
+                    psutil.disk_usage('/')
+                )
+                self._sampled_at = now
+            return self._sample
+
+
+_psutil_cache: Optional[_PsutilCache] = None
+_psutil_cache_lock = threading.Lock()
+
+
+def _psutil_sample() -> tuple:
+    """Sample through the shared cache, creating it on first use rather than at import"""
+    global _psutil_cache
+    cache = _psutil_cache
+    if cache is None:
+        with _psutil_cache_lock:
+            if _psutil_cache is None:
+                _psutil_cache = _PsutilCache()
+            cache = _psutil_cache
+    return cache.sample()
+
+
+def _numeric_columns(rows: List[Dict[str, Any]]) -> Dict[str, List[float]]:
+    """Split metric rows into per-field columns of their numeric values, in one pass"""
+    columns: Dict[str, List[float]] = {}
+    for row in rows:
+        for key, value in row.items():
+            if isinstance(value, (int, float)) and key != "timestamp":
+                column = columns.get(key)
+                if column is None:
+                    columns[key] = [value]
+                else:
+                    column.append(value)
+    return columns
+
 
 class AlertSeverity(Enum):
     """Alert severity levels"""
@@ -53,26 +126,21 @@ class MonitoringCollector:
         self.logger = create_logger("monitoring_collector")
         self.metrics_collector = MetricsCollector()
         self.performance_monitor = PerformanceMonitor()
-        self.collected_metrics: List[Dict[str, Any]] = []
-        self._lock = threading.Lock()
+        # Keep only recent metrics (last 1000 entries). No lock: deque.append and
+        # a C-level copy of the deque are each atomic under the GIL
+        self.collected_metrics: deque = deque(maxlen=1000)
     
     def collect_metrics(self, metrics_data: Dict[str, Any]):
         """Collect metrics data"""
-        with self._lock:
-            timestamped_metrics = {
-                "timestamp": datetime.now().isoformat(),
-                **metrics_data
-            }
-            self.collected_metrics.append(timestamped_metrics)
-            
-            # Keep only recent metrics (last 1000 entries)
-            if len(self.collected_metrics) > 1000:
-                self.collected_metrics = self.collected_metrics[-1000:]
+        self.collected_metrics.append({
+            "timestamp": datetime.now().isoformat(),
+            **metrics_data
+        })
     
     def get_recent_metrics(self, limit: int = 100) -> List[Dict[str, Any]]:
         """Get recent metrics"""
-        with self._lock:
-            return self.collected_metrics[-limit:]
+        start = max(0, len(self.collected_metrics) - limit)
+        return list(itertools.islice(self.collected_metrics, start, None))
     
     def log_metrics_summary(self):
         """Log metrics summary"""
@@ -87,30 +155,15 @@ class MonitoringCollector:
     
     def _calculate_metrics_summary(self, metrics: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Calculate summary statistics for metrics"""
-        if not metrics:
-            return {}
-        
-        # Extract numeric metrics
-        numeric_fields = {}
-        for metric in metrics:
-            for key, value in metric.items():
-                if isinstance(value, (int, float)) and key != "timestamp":
-                    if key not in numeric_fields:
-                        numeric_fields[key] = []
-                    numeric_fields[key].append(value)
-        
-        # Calculate statistics
-        summary = {}
-        for field, values in numeric_fields.items():
-            if values:
-                summary[field] = {
-                    "avg": sum(values) / len(values),
-                    "min": min(values),
-                    "max": max(values),
-                    "count": len(values)
-                }
-        
-        return summary
+        return {
+            field: {
+                "avg": math.fsum(values) / len(values),
+                "min": min(values),
+                "max": max(values),
+                "count": len(values)
+            }
+            for field, values in _numeric_columns(metrics).items()
+        }
 
 
 class HealthChecker:
@@ -134,26 +187,15 @@ class HealthChecker:
             "components": {}
         }
         
-        overall_healthy = True
-        
-        for component, check_func in self.checks.items():
-            try:
-                is_healthy = await self._run_check(check_func)
-                health_status["components"][component] = {
-                    "status": "healthy" if is_healthy else "unhealthy",
-                    "checked_at": datetime.now().isoformat()
-                }
-                
-                if not is_healthy:
-                    overall_healthy = False
-                    
-            except Exception as e:
-                health_status["components"][component] = {
-                    "status": "error",
-                    "error": str(e),
-                    "checked_at": datetime.now().isoformat()
-                }
-                overall_healthy = False
+        # Run all component checks concurrently; the slowest one bounds the latency
+        checks = list(self.checks.items())
+        results = await asyncio.gather(*(
+            self._check_component(check_func) for _, check_func in checks
+        ))
+        health_status["components"] = {
+            component: result for (component, _), result in zip(checks, results)
+        }
+        overall_healthy = all(result["status"] == "healthy" for result in results)
         
         health_status["status"] = "healthy" if overall_healthy else "unhealthy"
         
@@ -166,12 +208,28 @@ class HealthChecker:
         
         return health_status
     
+    async def _check_component(self, check_func: Callable) -> Dict[str, Any]:
+        """Run one component check and describe its result"""
+        try:
+            is_healthy = await self._run_check(check_func)
+            return {
+                "status": "healthy" if is_healthy else "unhealthy",
+                "checked_at": datetime.now().isoformat()
+            }
+        except Exception as e:
+            return {
+                "status": "error",
+                "error": str(e),
+                "checked_at": datetime.now().isoformat()
+            }
+    
     async def _run_check(self, check_func: Callable) -> bool:
         """Run individual health check"""
         if asyncio.iscoroutinefunction(check_func):
             return await check_func()
         else:
-            return check_func()
+            # Synchronous checks may block on I/O, so keep them off the event loop
+            return await asyncio.to_thread(check_func)
     
     def _check_api_health(self) -> bool:
         """Check API health"""
@@ -194,7 +252,7 @@ class HealthChecker:
     def _check_memory_health(self) -> bool:
         """Check memory health"""
         try:
-            memory = psutil.virtual_memory()
+            memory, _, _ = _psutil_sample()
             return memory.percent < 90  # Less than 90% memory usage
         except Exception:
             return False
@@ -202,7 +260,7 @@ class HealthChecker:
     def _check_disk_health(self) -> bool:
         """Check disk health"""
         try:
-            disk = psutil.disk_usage('/')
+            _, _, disk = _psutil_sample()
             return disk.percent < 85  # Less than 85% disk usage
         except Exception:
             return False
@@ -215,7 +273,12 @@ class AlertManager:
         self.logger = create_logger("alert_manager")
         self.thresholds: Dict[str, float] = {}
         self.alerts_history: deque = deque(maxlen=1000)
-        self.rate_limiting: Dict[str, Dict[str, Any]] = defaultdict(dict)
+        # Monotonic record times kept in lockstep with alerts_history (ascending)
+        self._alert_times: deque = deque(maxlen=1000)
+        # Per-metric rate limiting state, timed on the monotonic clock
+        self.rate_limiting: Dict[str, Dict[str, Any]] = defaultdict(
+            lambda: {"last_alert": None, "recent_alerts": deque()}
+        )
         self.max_alerts_per_minute = 10
         self.cooldown_minutes = 5
     
@@ -233,66 +296,57 @@ class AlertManager:
         """Check metrics against thresholds and generate alerts"""
         alerts = []
         
-        for metric, value in metrics.items():
-            if metric in self.thresholds and isinstance(value, (int, float)):
-                threshold = self.thresholds[metric]
+        # Only thresholded metrics can alert, so walk the thresholds, not the metrics
+        for metric, threshold in self.thresholds.items():
+            value = metrics.get(metric)
+            if not isinstance(value, (int, float)) or value <= threshold:
+                continue
+            
+            # Check rate limiting
+            if self._should_send_alert(metric):
+                severity = self._determine_severity(metric, value, threshold)
+                alert = Alert(
+                    metric=metric,
+                    value=value,
+                    threshold=threshold,
+                    severity=severity,
+                    message=f"{metric} value {value} exceeds threshold {threshold}"
+                )
                 
-                if value > threshold:
-                    # Check rate limiting
-                    if self._should_send_alert(metric):
-                        severity = self._determine_severity(metric, value, threshold)
-                        alert = Alert(
-                            metric=metric,
-                            value=value,
-                            threshold=threshold,
-                            severity=severity,
-                            message=f"{metric} value {value} exceeds threshold {threshold}"
-                        )
-                        
-                        alerts.append(alert)
-                        self._record_alert(alert)
+                alerts.append(alert)
+                self._record_alert(alert)
         
         return alerts
     
     def _should_send_alert(self, metric: str) -> bool:
         """Check if alert should be sent based on rate limiting"""
-        now = datetime.now()
+        now = time.monotonic()
         metric_data = self.rate_limiting[metric]
         
         # Check cooldown
-        last_alert = metric_data.get("last_alert")
-        if last_alert and (now - last_alert).total_seconds() < self.cooldown_minutes * 60:
+        last_alert = metric_data["last_alert"]
+        if last_alert is not None and now - last_alert < self.cooldown_minutes * 60:
             return False
         
-        # Check rate limit
-        recent_alerts = metric_data.get("recent_alerts", [])
-        one_minute_ago = now - timedelta(minutes=1)
-        recent_alerts = [alert_time for alert_time in recent_alerts if alert_time > one_minute_ago]
-        
-        if len(recent_alerts) >= self.max_alerts_per_minute:
-            return False
+        # Check rate limit, dropping alerts older than a minute
+        recent_alerts = metric_data["recent_alerts"]
+        one_minute_ago = now - 60
+        while recent_alerts and recent_alerts[0] <= one_minute_ago:
+            recent_alerts.popleft()
         
-        return True
+        return len(recent_alerts) < self.max_alerts_per_minute
     
     def _record_alert(self, alert: Alert):
         """Record alert for rate limiting"""
-        now = datetime.now()
+        now = time.monotonic()
         metric_data = self.rate_limiting[alert.metric]
         
         metric_data["last_alert"] = now
-        if "recent_alerts" not in metric_data:
-            metric_data["recent_alerts"] = []
         metric_data["recent_alerts"].append(now)
         
-        # Keep only recent alerts
-        one_minute_ago = now - timedelta(minutes=1)
-        metric_data["recent_alerts"] = [
-            alert_time for alert_time in metric_data["recent_alerts"] 
-            if alert_time > one_minute_ago
-        ]
-        
         # Add to history
         self.alerts_history.append(alert)
+        self._alert_times.append(now)
         
         # Log alert
         self.logger.warning(
@@ -316,14 +370,15 @@ class AlertManager:
     
     def get_active_alerts(self, severity: Optional[AlertSeverity] = None) -> List[Alert]:
         """Get active alerts, optionally filtered by severity"""
-        alerts = list(self.alerts_history)
+        # Return alerts recorded in the last 24 hours; history is time-ordered,
+        # so bisect for the expired prefix and slice it off a list copy (islice
+        # would still walk the deque from the left)
+        start = bisect.bisect_right(self._alert_times, time.monotonic() - 86400.0)
+        alerts = list(self.alerts_history)[start:]
         
         if severity:
-            alerts = [alert for alert in alerts if alert.severity == severity]
-        
-        # Return alerts from last 24 hours
-        one_day_ago = datetime.now() - timedelta(days=1)
-        return [alert for alert in alerts if alert.timestamp > one_day_ago]
+            return [alert for alert in alerts if alert.severity == severity]
+        return alerts
 
 
 class DashboardDataProvider:
@@ -364,9 +419,7 @@ class DashboardDataProvider:
         """Get current system metrics"""
         try:
             # System metrics
-            memory = psutil.virtual_memory()
-            cpu_percent = psutil.cpu_percent()
-            disk = psutil.disk_usage('/')
+            memory, cpu_percent, disk = _psutil_sample()
             
             return {
                 "memory_percent": memory.percent,
@@ -401,31 +454,15 @@ class DashboardDataProvider:
     
     def calculate_summary_stats(self, metrics_history: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Calculate summary statistics for dashboard"""
-        if not metrics_history:
-            return {}
-        
-        summary = {}
-        
-        # Extract numeric fields
-        numeric_fields = {}
-        for metric in metrics_history:
-            for key, value in metric.items():
-                if isinstance(value, (int, float)) and key != "timestamp":
-                    if key not in numeric_fields:
-                        numeric_fields[key] = []
-                    numeric_fields[key].append(value)
-        
-        # Calculate stats
-        for field, values in numeric_fields.items():
-            if values:
-                summary[field] = {
-                    "avg": sum(values) / len(values),
-                    "min": min(values),
-                    "max": max(values),
-                    "latest": values[-1] if values else 0
-                }
-        
-        return summary
+        return {
+            field: {
+                "avg": math.fsum(values) / len(values),
+                "min": min(values),
+                "max": max(values),
+                "latest": values[-1]
+            }
+            for field, values in _numeric_columns(metrics_history).items()
+        }
 
 
 class SystemMetrics:
@@ -437,6 +474,7 @@ class SystemMetrics:
         self.thresholds: Dict[str, float] = {}
         self.is_collecting = False
         self.collection_task: Optional[asyncio.Task] = None
+        self._process = psutil.Process()
     
     def configure_thresholds(self, thresholds: Dict[str, float]):
         """Configure warning thresholds"""
@@ -477,27 +515,23 @@ class SystemMetrics:
     def _collect_system_metrics(self) -> Dict[str, Any]:
         """Collect current system metrics"""
         try:
-            # Memory metrics
-            memory = psutil.virtual_memory()
-            
-            # CPU metrics
-            cpu_percent = psutil.cpu_percent(interval=1)
-            
-            # Disk metrics
-            disk = psutil.disk_usage('/')
+            # Memory, CPU and disk metrics
+            memory, cpu_percent, disk = _psutil_sample()
             
             # Process metrics
-            process = psutil.Process()
-            process_memory = process.memory_info()
+            process = self._process
+            with process.oneshot():
+                process_memory_mb = process.memory_info().rss * _BYTES_TO_MB
+                process_cpu_percent = process.cpu_percent()
             
             return {
                 "memory_percent": memory.percent,
-                "memory_available_gb": memory.available / 1024 / 1024 / 1024,
+                "memory_available_gb": memory.available * _BYTES_TO_GB,
                 "cpu_percent": cpu_percent,
                 "disk_percent": disk.percent,
-                "disk_free_gb": disk.free / 1024 / 1024 / 1024,
-                "process_memory_mb": process_memory.rss / 1024 / 1024,
-                "process_cpu_percent": process.cpu_percent()
+                "disk_free_gb": disk.free * _BYTES_TO_GB,
+                "process_memory_mb": process_memory_mb,
+                "process_cpu_percent": process_cpu_percent
             }
         except Exception as e:
             self.logger.error(f"Error collecting system metrics: {e}")
@@ -505,14 +539,13 @@ class SystemMetrics:
     
     def check_thresholds(self, metrics: Dict[str, Any]):
         """Check metrics against warning thresholds"""
-        for metric, value in metrics.items():
-            if metric in self.thresholds and isinstance(value, (int, float)):
-                threshold = self.thresholds[metric]
-                if value > threshold:
-                    self.logger.warning(
-                        f"{metric.replace('_', ' ').title()} exceeds threshold",
-                        metric=metric,
-                        value=value,
-                        threshold=threshold,
-                        percentage_over=((value - threshold) / threshold) * 100
-                    )
\ No newline at end of file
+        for metric, threshold in self.thresholds.items():
+            value = metrics.get(metric)
+            if isinstance(value, (int, float)) and value > threshold:
+                self.logger.warning(
+                    f"{metric.replace('_', ' ').title()} exceeds threshold",
+                    metric=metric,
+                    value=value,
+                    threshold=threshold,
+                    percentage_over=((value - threshold) / threshold) * 100
+                )
\ No newline at end of file
@@ -5,11 +5,12 @@ import asyncio
 import logging
 import random
 import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from functools import wraps
-from typing import TypeVar, Callable, Union, Tuple, Any, Dict
+from typing import TypeVar, Callable, Union, Tuple, Any, Dict, Optional
 from dataclasses import dataclass
 from enum import Enum
-import aiohttp
 
 
 T = TypeVar('T')
@@ -17,35 +18,100 @@ logger = logging.getLogger(__name__)
 
 
 class APIError(Exception):
-    """Base API error"""
-    pass
+    """Base API error; without a message, str() is built from op/status/detail on demand"""
+    
+    def __init__(
+        self,
+        message: str = "",
+        *,
+        op: str = "API request",
+        status: Optional[int] = None,
+        detail: Any = None
+    ):
+        super().__init__(message)
+        self.message = message
+        self.op = op
+        self.status = status
+        self.detail = detail
+    
+    def __str__(self) -> str:
+        if self.message:
+            return self.message
+        if self.status is not None:
+            return f"{self.op} failed with status {self.status}"
+        if self.detail is not None:
+            return f"{self.op} failed: {self.detail}"
+        return f"{self.op} failed"
 
 
 class RateLimitError(APIError):
     """Rate limit exceeded error"""
-    pass
+    
+    def __init__(self, message: str = "", retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Any) -> Optional[float]:
+    """
+    Parse a Retry-After header value into seconds
+    
+    Args:
+        value: Header value, either delta-seconds or an HTTP-date
+    
+    Returns:
+        Seconds to wait, or None if the value is missing or malformed
+    """
+    if not isinstance(value, str):
+        return None
+    
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
 
 
 def retry_on_error(
     max_attempts: int = 3,
     delay: float = 1.0,
     backoff: float = 2.0,
-    exceptions: Tuple[type, ...] = (APIError,)
+    exceptions: Tuple[type, ...] = (APIError,),
+    max_delay: float = 30.0,
+    jitter: float = 0.25
 ):
     """
     Retry decorator for async functions
     
+    Delays grow exponentially and are stretched by a random jitter factor.
+    A RateLimitError carrying retry_after (from the server's Retry-After
+    header) waits that long instead. Every wait, jittered or server-provided,
+    is capped at max_delay. With max_attempts of 1 or less there is nothing
+    to retry, and the function is returned as is.
+    
     Args:
         max_attempts: Maximum retry attempts
         delay: Initial delay between retries in seconds
         backoff: Backoff multiplier for delay
         exceptions: Exception types to retry on
+        max_delay: Upper bound for any single wait between attempts
+        jitter: Maximum fraction of random delay added to each wait
     """
+    if max_attempts <= 1:
+        return lambda func: func
+    
     def decorator(func: Callable[..., T]) -> Callable[..., T]:
         @wraps(func)
         async def wrapper(*args, **kwargs) -> T:
             last_exception = None
-            current_delay = delay
             
             for attempt in range(max_attempts):
                 try:
@@ -53,20 +119,22 @@ def retry_on_error(
                 except exceptions as e:
                     last_exception = e
                     
-                    # Special handling for rate limit errors
-                    if isinstance(e, RateLimitError):
-                        current_delay = 60.0  # Wait longer for rate limits
-                    
                     logger.warning(
-                        f"Attempt {attempt + 1}/{max_attempts} failed for {func.__name__}: {str(e)}"
+                        "Attempt %d/%d failed for %s: %s",
+                        attempt + 1, max_attempts, func.__name__, e
                     )
                     
                     # Don't sleep on the last attempt
                     if attempt < max_attempts - 1:
-                        await asyncio.sleep(current_delay)
-                        current_delay *= backoff
+                        retry_after = getattr(e, "retry_after", None)
+                        if retry_after is not None:
+                            wait = retry_after
+                        else:
+                            wait = delay * backoff ** attempt
+                            wait *= 1 + random.uniform(0, jitter)
+                        await asyncio.sleep(min(max_delay, wait))
                     else:
-                        logger.error(f"All {max_attempts} attempts failed for {func.__name__}")
+                        logger.error("All %d attempts failed for %s", max_attempts, func.__name__)
             
             # Re-raise the last exception if all attempts failed
             raise last_exception
@@ -130,10 +198,10 @@ class RetryHandler:
                     if self._is_rate_limit_error(e):
                         delay = max(delay, 5.0)  # Minimum 5 seconds for rate limits
                     
-                    logger.warning(f"Attempt {attempt + 1} failed: {e}. Retrying in {delay:.2f}s")
+                    logger.warning("Attempt %d failed: %s. Retrying in %.2fs", attempt + 1, e, delay)
                     await asyncio.sleep(delay)
                 else:
-                    logger.error(f"All {self.max_retries + 1} attempts failed. Last error: {e}")
+                    logger.error("All %d attempts failed. Last error: %s", self.max_retries + 1, e)
         
         raise last_exception
     
@@ -148,8 +216,8 @@ class RetryHandler:
     
     def _is_rate_limit_error(self, error: Exception) -> bool:
         """Check if error is a rate limit error"""
-        if isinstance(error, aiohttp.ClientResponseError):
-            return error.status == 429
+        if isinstance(error, RateLimitError):
+            return True
         return "rate limit" in str(error).lower()
     
     def get_metrics(self) -> Dict[str, Any]:
@@ -214,7 +282,7 @@ class CircuitBreaker:
         
         if self.failure_count >= self.failure_threshold:
             self.state = CircuitBreakerState.OPEN
-            logger.warning(f"Circuit breaker transitioning to OPEN after {self.failure_count} failures")
+            logger.warning("Circuit breaker transitioning to OPEN after %d failures", self.failure_count)
 
 
 class BackpressureHandler:
@@ -266,7 +334,7 @@ class BackpressureHandler:
             except asyncio.CancelledError:
                 break
             except Exception as e:
-                logger.error(f"Error processing queue item: {e}")
+                logger.error("Error processing queue item: %s", e)
     
     def get_queue_size(self) -> int:
         """Get current queue size"""
@@ -285,4 +353,34 @@ class BackpressureHandler:
     def cleanup(self):
         """Clean up resources"""
         if self._processor_task:
-            self._processor_task.cancel()
\ No newline at end of file
+            self._processor_task.cancel()
+
+
+class AsyncTokenBucket:
+    """Token-bucket rate limiter for outbound requests"""
+    
+    def __init__(self, capacity: float, refill_per_sec: float):
+        if capacity <= 0 or refill_per_sec <= 0:
+            raise ValueError(
+                f"Token bucket needs a positive capacity and refill rate, "
+                f"got {capacity} and {refill_per_sec}"
+            )
+        self.capacity = capacity
+        self.refill_per_sec = refill_per_sec
+        self.tokens: float = capacity
+        self._last_refill = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._last_refill) * self.refill_per_sec)
+        self._last_refill = now
+    
+    async def acquire(self):
+        """Wait until a token is available, then consume it"""
+        async with self._lock:
+            self._refill()
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.refill_per_sec)
+                self._refill()
+            self.tokens -= 1
@@ -1,12 +1,16 @@
 """
 Test configuration and fixtures for MCP Market Index Server
 """
+import os
 import pytest
 import asyncio
 from unittest.mock import Mock, AsyncMock
 from datetime import datetime, timedelta
 from typing import Dict, Any
 
+# Keep tests (including module-level clients) off the on-disk token cache
+os.environ["TOKEN_CACHE_PATH"] = ""
+
 from src.utils.cache import MarketDataCache
 from src.api.client import KoreaInvestmentAPI
 from src.config import Settings
@@ -5,12 +5,22 @@ import pytest
 import asyncio
 from unittest.mock import AsyncMock, Mock, patch
 from datetime import datetime, timedelta
-import aiohttp
+import httpx
+import orjson
 
 from src.api.client import KoreaInvestmentAPI
 from src.api.models import IndexData, ChartData, SectorData
 
 
+def _http_response(data=None, status_code=200, headers=None):
+    """Build a mock httpx response carrying a JSON body"""
+    response = Mock()
+    response.status_code = status_code
+    response.content = orjson.dumps(data) if data is not None else b""
+    response.headers = headers or {}
+    return response
+
+
 class TestKoreaInvestmentAPI:
     """Test cases for Korea Investment API client"""
     
@@ -75,10 +85,8 @@ class TestKoreaInvestmentAPI:
     @pytest.mark.asyncio
     async def test_get_access_token_success(self, api_client, mock_token_response):
         """Test successful token acquisition"""
-        with patch('aiohttp.ClientSession.post') as mock_post:
-            mock_response = AsyncMock()
-            mock_response.json.return_value = mock_token_response
-            mock_post.return_value.__aenter__.return_value = mock_response
+        with patch('httpx.AsyncClient.post', new_callable=AsyncMock) as mock_post:
+            mock_post.return_value = _http_response(mock_token_response)
             
             token = await api_client._get_access_token()
             
@@ -93,7 +101,7 @@ class TestKoreaInvestmentAPI:
         api_client.access_token = "cached_token"
         api_client.token_expires = datetime.now() + timedelta(minutes=30)
         
-        with patch('aiohttp.ClientSession.post') as mock_post:
+        with patch('httpx.AsyncClient.post', new_callable=AsyncMock) as mock_post:
             token = await api_client._get_access_token()
             
             assert token == "cached_token"
@@ -106,25 +114,71 @@ class TestKoreaInvestmentAPI:
         api_client.access_token = "expired_token"
         api_client.token_expires = datetime.now() - timedelta(minutes=1)
         
-        with patch('aiohttp.ClientSession.post') as mock_post:
-            mock_response = AsyncMock()
-            mock_response.json.return_value = mock_token_response
-            mock_post.return_value.__aenter__.return_value = mock_response
+        with patch('httpx.AsyncClient.post', new_callable=AsyncMock) as mock_post:
+            mock_post.return_value = _http_response(mock_token_response)
             
             token = await api_client._get_access_token()
             
             assert token == "test_token_123"
             assert mock_post.called
     
+    @pytest.mark.asyncio
+    async def test_get_access_token_refreshes_early(self, api_client, mock_token_response):
+        """Test token is scheduled for refresh before server-side expiry"""
+        with patch('httpx.AsyncClient.post', new_callable=AsyncMock) as mock_post:
+            mock_post.return_value = _http_response(mock_token_response)
+            
+            await api_client._get_access_token()
+            
+            margin = timedelta(seconds=api_client.TOKEN_REFRESH_MARGIN - 1)
+            assert api_client.token_expires < datetime.now() + timedelta(seconds=3600) - margin
+        
+        await api_client.close()
+    
+    def test_zero_rate_limit_disables_limiter(self, monkeypatch):
+        """Test MAX_REQUESTS_PER_MINUTE=0 means unlimited rather than a crash"""
+        from src.config import get_settings
+        monkeypatch.setattr(get_settings(), "max_requests_per_minute", 0)
+        
+        client = KoreaInvestmentAPI(app_key="test_key", app_secret="test_secret")
+        assert client._limiter is None
+    
+    @pytest.mark.asyncio
+    async def test_access_token_persisted_across_instances(
+        self, mock_token_response, tmp_path, monkeypatch
+    ):
+        """Test token is written to disk and reused by a new client"""
+        from src.config import get_settings
+        monkeypatch.setattr(get_settings(), "token_cache_path", str(tmp_path / "token.cache"))
+        
+        first = KoreaInvestmentAPI(app_key="test_key", app_secret="test_secret")
+        with patch('httpx.AsyncClient.post', new_callable=AsyncMock) as mock_post:
+            mock_post.return_value = _http_response(mock_token_response)
+            
+            await first._get_access_token()
+        await first.close()
+        
+        cache_files = list(tmp_path.glob("token.*.cache"))
+        assert len(cache_files) == 1
+        assert cache_files[0].stat().st_mode & 0o777 == 0o600
+        
+        second = KoreaInvestmentAPI(app_key="test_key", app_secret="test_secret")
+        with patch('httpx.AsyncClient.post', new_callable=AsyncMock) as mock_post:
+            token = await second._get_access_token()
+            
+            assert token == "test_token_123"
+            assert not mock_post.called
+        
+        other = KoreaInvestmentAPI(app_key="other_key", app_secret="test_secret")
+        assert other.access_token is None
+
     @pytest.mark.asyncio
     async def test_get_index_price_kospi(self, api_client, mock_index_response):
         """Test KOSPI index price retrieval"""
         with patch.object(api_client, '_get_access_token', return_value="test_token"), \
-             patch('aiohttp.ClientSession.get') as mock_get:
+             patch('httpx.AsyncClient.get', new_callable=AsyncMock) as mock_get:
             
-            mock_response = AsyncMock()
-            mock_response.json.return_value = mock_index_response
-            mock_get.return_value.__aenter__.return_value = mock_response
+            mock_get.return_value = _http_response(mock_index_response)
             
             result = await api_client.get_index_price("0001")
             
@@ -138,11 +192,9 @@ class TestKoreaInvestmentAPI:
     async def test_get_index_price_kosdaq(self, api_client, mock_index_response):
         """Test KOSDAQ index price retrieval"""
         with patch.object(api_client, '_get_access_token', return_value="test_token"), \
-             patch('aiohttp.ClientSession.get') as mock_get:
+             patch('httpx.AsyncClient.get', new_callable=AsyncMock) as mock_get:
             
-            mock_response = AsyncMock()
-            mock_response.json.return_value = mock_index_response
-            mock_get.return_value.__aenter__.return_value = mock_response
+            mock_get.return_value = _http_response(mock_index_response)
             
             result = await api_client.get_index_price("1001")
             
@@ -156,11 +208,9 @@ class TestKoreaInvestmentAPI:
     async def test_get_chart_data(self, api_client, mock_chart_response):
         """Test chart data retrieval"""
         with patch.object(api_client, '_get_access_token', return_value="test_token"), \
-             patch('aiohttp.ClientSession.get') as mock_get:
+             patch('httpx.AsyncClient.get', new_callable=AsyncMock) as mock_get:
             
-            mock_response = AsyncMock()
-            mock_response.json.return_value = mock_chart_response
-            mock_get.return_value.__aenter__.return_value = mock_response
+            mock_get.return_value = _http_response(mock_chart_response)
             
             result = await api_client.get_index_chart_data(
                 index_code="0001",
@@ -177,28 +227,93 @@ class TestKoreaInvestmentAPI:
             assert params['FID_PERIOD_DIV_CODE'] == "D"
             assert params['FID_INPUT_DATE_1'] == "20240110"
     
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_requests_coalesced(self, api_client, mock_index_response):
+        """Test that concurrent identical requests share a single HTTP call"""
+        call_count = 0
+        
+        async def slow_get_json(path, headers, params, key, conditional=False):
+            nonlocal call_count
+            call_count += 1
+            await asyncio.sleep(0.05)
+            return mock_index_response
+        
+        with patch.object(api_client, '_get_access_token', return_value="test_token"), \
+             patch.object(api_client, '_get_json', side_effect=slow_get_json):
+            
+            results = await asyncio.gather(
+                *[api_client.get_index_price("0001") for _ in range(5)],
+                api_client.get_index_price("1001")
+            )
+            
+            assert all(result == mock_index_response for result in results)
+            assert call_count == 2  # One per distinct index code
+            assert api_client._inflight == {}
+    
+    @pytest.mark.asyncio
+    async def test_conditional_get_reuses_body_on_304(self, api_client, mock_chart_response):
+        """Test ETag is sent on refetch and a 304 returns the previous body"""
+        with patch.object(api_client, '_get_access_token', return_value="test_token"), \
+             patch('httpx.AsyncClient.get', new_callable=AsyncMock) as mock_get:
+            
+            first = _http_response(mock_chart_response, headers={"ETag": '"abc"'})
+            not_modified = _http_response(status_code=304)
+            mock_get.side_effect = [first, not_modified]
+            
+            result1 = await api_client.get_index_chart_data("0001", "D", "20240110")
+            result2 = await api_client.get_index_chart_data("0001", "D", "20240110")
+            
+            assert result2 == result1
+            assert result2 is not result1
+            assert "If-None-Match" not in mock_get.call_args_list[0][1]['headers']
+            assert mock_get.call_args_list[1][1]['headers']['If-None-Match'] == '"abc"'
+        
+        await api_client.close()
+    
+    @pytest.mark.asyncio
+    async def test_conditional_cache_limited_to_chart_and_bounded(self, api_client, mock_index_response,
+                                                                  mock_chart_response):
+        """Test only chart responses are revalidated and the cache evicts old entries"""
+        api_client.CONDITIONAL_CACHE_SIZE = 2
+        with patch.object(api_client, '_get_access_token', return_value="test_token"), \
+             patch('httpx.AsyncClient.get', new_callable=AsyncMock) as mock_get:
+            
+            mock_get.side_effect = lambda *args, **kwargs: _http_response(
+                mock_chart_response, headers={"ETag": '"abc"'}
+            )
+            for date in ("20240108", "20240109", "20240110"):
+                await api_client.get_index_chart_data("0001", "D", date)
+            
+            mock_get.side_effect = lambda *args, **kwargs: _http_response(
+                mock_index_response, headers={"ETag": '"def"'}
+            )
+            await api_client.get_index_price("0001")
+            
+            assert [dict(key[1])["FID_INPUT_DATE_1"] for key in api_client._conditional] == [
+                "20240109", "20240110"
+            ]
+        
+        await api_client.close()
+    
     @pytest.mark.asyncio
     async def test_api_error_handling(self, api_client):
         """Test API error handling"""
         with patch.object(api_client, '_get_access_token', return_value="test_token"), \
-             patch('aiohttp.ClientSession.get') as mock_get:
+             patch('httpx.AsyncClient.get', new_callable=AsyncMock) as mock_get:
             
             # Simulate HTTP error
-            mock_get.side_effect = aiohttp.ClientError("Connection failed")
+            mock_get.side_effect = httpx.ConnectError("Connection failed")
             
-            with pytest.raises(aiohttp.ClientError):
+            with pytest.raises(httpx.ConnectError):
                 await api_client.get_index_price("0001")
     
     @pytest.mark.asyncio
     async def test_rate_limit_handling(self, api_client):
         """Test rate limit error handling"""
         with patch.object(api_client, '_get_access_token', return_value="test_token"), \
-             patch('aiohttp.ClientSession.get') as mock_get:
+             patch('httpx.AsyncClient.get', new_callable=AsyncMock) as mock_get:
             
-            mock_response = AsyncMock()
-            mock_response.status = 429  # Rate limit
-            mock_response.json.return_value = {"error": "Rate limit exceeded"}
-            mock_get.return_value.__aenter__.return_value = mock_response
+            mock_get.return_value = _http_response({"error": "Rate limit exceeded"}, status_code=429)
             
             result = await api_client.get_index_price("0001")
             
@@ -222,11 +337,9 @@ class TestKoreaInvestmentAPI:
         }
         
         with patch.object(api_client, '_get_access_token', return_value="test_token"), \
-             patch('aiohttp.ClientSession.get') as mock_get:
+             patch('httpx.AsyncClient.get', new_callable=AsyncMock) as mock_get:
             
-            mock_response = AsyncMock()
-            mock_response.json.return_value = mock_response_data
-            mock_get.return_value.__aenter__.return_value = mock_response
+            mock_get.return_value = _http_response(mock_response_data)
             
             result = await api_client.get_sector_indices("KOSPI")
             
@@ -265,12 +378,9 @@ class TestKoreaInvestmentAPI:
             nonlocal call_count
             call_count += 1
             await asyncio.sleep(0.1)  # Simulate API delay
-            mock_response = AsyncMock()
-            mock_response.json.return_value = mock_token_response
-            return mock_response
+            return _http_response(mock_token_response)
         
-        with patch('aiohttp.ClientSession.post') as mock_post_patch:
-            mock_post_patch.return_value.__aenter__ = mock_post
+        with patch('httpx.AsyncClient.post', side_effect=mock_post):
             
             # Make multiple concurrent token requests
             tasks = [api_client._get_access_token() for _ in range(5)]
@@ -2,6 +2,7 @@
 Tests for API Data Models
 """
 import pytest
+from dataclasses import FrozenInstanceError
 from datetime import datetime
 from decimal import Decimal
 from pydantic import ValidationError
@@ -36,6 +37,17 @@ class TestIndexData:
         assert data.amount == 8500000000000
         assert isinstance(data.timestamp, datetime)
     
+    def test_index_data_timestamp_default_only_when_missing(self):
+        """Test a supplied timestamp is kept and a missing one is filled"""
+        fields = dict(
+            current=2500.50, change=15.30, change_rate=0.61, volume=450000000,
+            amount=8500000000000, high=2510.20, low=2485.30, open=2490.00
+        )
+        api_time = datetime(2024, 1, 10, 15, 30, 0)
+        
+        assert IndexData(**fields, timestamp=api_time).timestamp == api_time
+        assert isinstance(IndexData(**fields).timestamp, datetime)
+    
     def test_index_data_validation_negative_current(self):
         """Test validation fails for negative current price"""
         with pytest.raises(ValidationError) as excinfo:
@@ -168,6 +180,22 @@ class TestChartPoint:
                 volume=15000000
             )
 
+    
+    def test_chart_point_is_frozen(self):
+        """Test that chart points are immutable and slotted"""
+        point = ChartPoint(
+            timestamp=datetime(2024, 1, 10, 9, 0, 0),
+            open=2490.00,
+            high=2495.00,
+            low=2485.00,
+            close=2491.20,
+            volume=15000000
+        )
+        
+        with pytest.raises(FrozenInstanceError):
+            point.close = 2500.00
+        assert not hasattr(point, "__dict__")
+
 
 class TestChartData:
     """Test cases for ChartData model"""
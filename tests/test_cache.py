@@ -3,7 +3,7 @@ Tests for Cache System
 """
 import pytest
 import asyncio
-from datetime import datetime, timedelta
+import time
 from unittest.mock import AsyncMock
 
 from src.utils.cache import MarketDataCache, CacheEntry
@@ -15,21 +15,22 @@ class TestCacheEntry:
     def test_cache_entry_creation(self):
         """Test creating cache entry"""
         data = {"test": "value"}
-        expires = datetime.now() + timedelta(seconds=10)
+        expires_at = time.monotonic() + 10
         
-        entry = CacheEntry(data=data, expires=expires)
+        entry = CacheEntry(data=data, expires_at=expires_at)
         
         assert entry.data == data
-        assert entry.expires == expires
+        assert entry.expires_at == expires_at
+        assert not hasattr(entry, "__dict__")  # Slotted: no per-entry dict
     
     def test_cache_entry_expired(self):
         """Test cache entry expiration check"""
         data = {"test": "value"}
-        expires = datetime.now() - timedelta(seconds=1)  # Already expired
+        expires_at = time.monotonic() - 1  # Already expired
         
-        entry = CacheEntry(data=data, expires=expires)
+        entry = CacheEntry(data=data, expires_at=expires_at)
         
-        assert entry.expires < datetime.now()
+        assert entry.expires_at < time.monotonic()
 
 
 class TestMarketDataCache:
@@ -124,7 +125,52 @@ class TestMarketDataCache:
         assert all(result == results[0] for result in results)
         # Only one fetch should have been called
         assert fetch_call_count == 1
-    
+        # In-flight bookkeeping is released once the fetch settles
+        assert cache._inflight == {}
+
+    @pytest.mark.asyncio
+    async def test_concurrent_fetch_error_shared(self, cache):
+        """Test a failing shared fetch raises for every waiter and is not cached"""
+        fetch_call_count = 0
+
+        async def failing_fetch():
+            nonlocal fetch_call_count
+            fetch_call_count += 1
+            await asyncio.sleep(0.05)
+            raise ValueError("upstream down")
+
+        results = await asyncio.gather(
+            *[cache.get_or_fetch("test_key", failing_fetch, ttl=5) for _ in range(3)],
+            return_exceptions=True
+        )
+
+        assert fetch_call_count == 1
+        assert all(isinstance(result, ValueError) for result in results)
+        assert "test_key" not in cache._cache
+        assert cache._inflight == {}
+
+    @pytest.mark.asyncio
+    async def test_stale_while_revalidate(self, cache):
+        """Test an entry in its stale window is served while refreshing"""
+        fetch_call_count = 0
+
+        async def fetch_func():
+            nonlocal fetch_call_count
+            fetch_call_count += 1
+            return {"call": fetch_call_count}
+
+        await cache.get_or_fetch("test_key", fetch_func, ttl=0, stale_ttl=5)
+        assert cache.is_stale("test_key")
+
+        # Stale data comes back immediately; refresh runs in the background
+        result = await cache.get_or_fetch("test_key", fetch_func, ttl=5, stale_ttl=5)
+        assert result["call"] == 1
+
+        await asyncio.sleep(0)
+        assert fetch_call_count == 2
+        assert not cache.is_stale("test_key")
+        assert cache.get("test_key")["call"] == 2
+
     @pytest.mark.asyncio
     async def test_different_keys_separate_fetches(self, cache, sample_data):
         """Test different keys trigger separate fetches"""
@@ -188,7 +234,32 @@ class TestMarketDataCache:
         
         assert cache.get("key1") is None
         assert cache.get("key2") is None
-    
+
+    def test_size_limit_evicts_soonest_expiring(self, sample_data):
+        """Test overflow evicts the entries closest to expiry"""
+        cache = MarketDataCache(max_size=3)
+        cache.set("short", sample_data, ttl=5)
+        cache.set("long", sample_data, ttl=60)
+        cache.set("medium", sample_data, ttl=30)
+        cache.set("longest", sample_data, ttl=120)
+
+        assert len(cache._cache) == 3
+        assert "short" not in cache._cache
+        assert cache.get("medium") is not None
+
+    def test_size_limit_cleanup_is_amortized(self, sample_data):
+        """Test small overflows are tolerated until the 110% threshold"""
+        cache = MarketDataCache(max_size=100)
+        for i in range(105):
+            cache.set(f"key{i}", sample_data, ttl=60)
+
+        assert len(cache._cache) == 105
+
+        for i in range(105, 111):
+            cache.set(f"key{i}", sample_data, ttl=60)
+
+        assert len(cache._cache) == 100
+
     def test_cleanup_expired_entries(self, cache, sample_data):
         """Test cleanup of expired entries"""
         # Add some entries with different TTLs
@@ -209,6 +280,37 @@ class TestMarketDataCache:
         assert stats["valid_keys"] == 0
         assert stats["expired_keys"] == 0
         assert stats["memory_usage"] == 0
+        assert stats["hit_rate"] == 0.0
+    
+    @pytest.mark.asyncio
+    async def test_get_stats_hit_rate(self, cache, sample_data):
+        """Test hit rate reflects lookups served from cache"""
+        fetch_func = AsyncMock(return_value=sample_data)
+        
+        await cache.get_or_fetch("test_key", fetch_func, ttl=10)  # Miss
+        await cache.get_or_fetch("test_key", fetch_func, ttl=10)  # Hit
+        cache.get("test_key")  # Hit
+        cache.get("missing_key")  # Miss
+        
+        stats = cache.get_stats()
+        assert stats["hits"] == 2
+        assert stats["misses"] == 2
+        assert stats["hit_rate"] == 0.5
+    
+    def test_peek_and_single_invalidate_keep_stats(self, cache, sample_data):
+        """Test peeking doesn't count and invalidating one key keeps statistics"""
+        cache.set("key1", sample_data, ttl=10)
+        cache.set("key2", sample_data, ttl=10)
+        cache.get("key1")  # Hit
+        
+        assert cache.peek("key1") == sample_data
+        assert cache.peek("missing_key") is None
+        cache.invalidate("key2")
+        assert cache.get_stats()["hits"] == 1
+        assert cache.get_stats()["misses"] == 0
+        
+        cache.invalidate()
+        assert cache.get_stats()["hits"] == 0
     
     def test_get_stats_with_data(self, cache, sample_data):
         """Test statistics with cache data"""
@@ -221,7 +323,22 @@ class TestMarketDataCache:
         assert stats["valid_keys"] == 1
         assert stats["expired_keys"] == 1
         assert stats["memory_usage"] > 0
-    
+
+    def test_memory_usage_tracks_removals(self, cache, sample_data):
+        """Test the running size estimate follows overwrites and removals"""
+        cache.set("key1", sample_data, ttl=10)
+        single = cache.get_stats()["memory_usage"]
+
+        cache.set("key1", sample_data, ttl=10)  # Overwrite is not double counted
+        cache.set("key2", sample_data, ttl=0)
+        assert cache.get_stats()["memory_usage"] == 2 * single
+
+        cache.cleanup_expired()
+        assert cache.get_stats()["memory_usage"] == single
+
+        cache.invalidate("key1")
+        assert cache.get_stats()["memory_usage"] == 0
+
     def test_get_cache_info_existing_key(self, cache, sample_data):
         """Test getting cache info for existing key"""
         cache.set("test_key", sample_data, ttl=10)
@@ -4,12 +4,12 @@ Integration Tests for MCP Market Index Server
 import pytest
 import asyncio
 import json
-from unittest.mock import patch, AsyncMock
+from unittest.mock import patch, AsyncMock, Mock
 from datetime import datetime
 
-from src.server import server, cache, api_client
+from src.server import server, cache, api_client, call_tool, list_tools
 from src.config import get_settings
-from mcp.types import TextContent
+from mcp.types import TextContent, ListToolsRequest
 
 
 class TestMCPServerIntegration:
@@ -125,6 +125,19 @@ class TestMCPServerIntegration:
         for expected_tool in expected_tools:
             assert expected_tool in tool_names
     
+    @pytest.mark.asyncio
+    async def test_tool_listing_reuses_prebuilt_list(self):
+        """Test list_tools returns the same list and the MCP handler leaves it intact"""
+        tools = await list_tools()
+        snapshot = list(tools)
+        
+        handler = server.request_handlers[ListToolsRequest]
+        await handler(ListToolsRequest(method="tools/list"))
+        await handler(ListToolsRequest(method="tools/list"))
+        
+        assert await list_tools() is tools
+        assert tools == snapshot
+    
     @pytest.mark.asyncio
     async def test_get_market_index_tool_integration(self, mock_api_responses):
         """Test get_market_index tool end-to-end"""
@@ -231,6 +244,23 @@ class TestMCPServerIntegration:
         assert len(result) == 1
         assert "Error" in result[0].text
     
+    @pytest.mark.asyncio
+    async def test_schema_validation_before_api_call(self):
+        """Test arguments are checked against inputSchema before dispatch"""
+        with patch.object(api_client, 'get_index_chart_data', new_callable=AsyncMock) as mock_chart:
+            result = await call_tool("get_index_chart", {"market": "KOSPI", "period": "5Y"})
+            
+            assert "Error" in result[0].text
+            assert not mock_chart.called
+        
+        with patch('src.server.get_index_chart', new_callable=AsyncMock) as mock_tool:
+            mock_tool.return_value = {}
+            await call_tool("get_index_chart", {"market": "KOSPI"})
+            
+            kwargs = mock_tool.call_args.kwargs
+            assert kwargs["period"] == "1D"
+            assert kwargs["interval"] == "5m"
+    
     @pytest.mark.asyncio
     async def test_cache_integration(self, mock_api_responses):
         """Test cache integration across multiple calls"""
@@ -296,14 +326,15 @@ class TestAPIClientIntegration:
     @pytest.mark.asyncio
     async def test_token_management_integration(self):
         """Test token management in real scenario"""
-        with patch('aiohttp.ClientSession.post') as mock_post:
-            mock_response = AsyncMock()
-            mock_response.json.return_value = {
+        with patch('httpx.AsyncClient.post', new_callable=AsyncMock) as mock_post:
+            mock_response = Mock()
+            mock_response.status_code = 200
+            mock_response.content = json.dumps({
                 "access_token": "test_token",
                 "expires_in": 3600,
                 "token_type": "Bearer"
-            }
-            mock_post.return_value.__aenter__.return_value = mock_response
+            }).encode()
+            mock_post.return_value = mock_response
             
             # First token request
             token1 = await api_client._get_access_token()
@@ -7,11 +7,15 @@ import asyncio
 from unittest.mock import AsyncMock, Mock
 from datetime import datetime, timedelta
 import json
+import statistics
 
 from src.tools.index_tools import get_market_index, get_index_chart
 from src.tools.market_tools import get_market_summary, get_sector_indices, get_market_compare
 from src.utils.cache import MarketDataCache
 from src.api.client import KoreaInvestmentAPI
+from src.utils.data_processor import (
+    LocalizationHelper, MarketStatusDetector, TechnicalIndicatorCalculator
+)
 
 
 class TestAdvancedDataProcessing:
@@ -72,6 +76,34 @@ class TestAdvancedDataProcessing:
         assert result["market_status"] in ["open", "closed", "pre_market", "after_hours"]
         assert "trading_session" in result
     
+    def test_market_status_for_minute_matches_detector(self):
+        """Test memoized per-minute status agrees with direct detection"""
+        for moment in [
+            datetime(2024, 1, 3, 8, 59, 50),   # Wednesday, pre-market
+            datetime(2024, 1, 3, 9, 0, 10),    # Opening minute
+            datetime(2024, 1, 3, 15, 30, 45),  # Just past close
+            datetime(2024, 1, 6, 11, 0, 0)     # Saturday
+        ]:
+            bucket = int(moment.timestamp()) // 60
+            assert MarketStatusDetector.status_for_minute(bucket) == (
+                MarketStatusDetector.get_market_status(moment),
+                MarketStatusDetector.get_trading_session(moment)
+            )
+    
+    def test_trading_session_boundaries(self):
+        """Test trading session resolves consistently with market status"""
+        cases = [
+            (datetime(2024, 1, 3, 8, 30), "pre_market", "pre_market"),
+            (datetime(2024, 1, 3, 9, 30), "open", "opening_session"),
+            (datetime(2024, 1, 3, 12, 0), "open", "regular_session"),
+            (datetime(2024, 1, 3, 15, 0), "open", "closing_session"),
+            (datetime(2024, 1, 3, 16, 0), "after_hours", "after_hours"),
+            (datetime(2024, 1, 7, 12, 0), "closed", "closed")  # Sunday
+        ]
+        for moment, status, session in cases:
+            assert MarketStatusDetector.get_market_status(moment) == status
+            assert MarketStatusDetector.get_trading_session(moment) == session
+    
     @pytest.mark.asyncio
     async def test_enhanced_chart_data_processing(self):
         """Test enhanced chart data with technical indicators"""
@@ -153,6 +185,39 @@ class TestAdvancedDataProcessing:
         rankings = result["performance_ranking"]
         assert len(rankings) > 0
         assert all("rank" in sector for sector in rankings)
+    
+    def test_chart_summary_stats_values(self):
+        """Test chart summary statistics are computed from the point columns"""
+        chart_data = [
+            {"open": 100.0, "high": 105.0 + i, "low": 95.0 - i, "close": 100.0 + i, "volume": 1000 * (i + 1)}
+            for i in range(5)
+        ]
+        
+        result = TechnicalIndicatorCalculator.analyze_chart_data(chart_data)
+        
+        stats = result["summary_stats"]
+        assert stats["highest_price"] == 109.0
+        assert stats["lowest_price"] == 91.0
+        assert stats["price_range"] == 18.0
+        assert stats["total_volume"] == 15000
+        assert stats["average_volume"] == 3000
+        assert result["technical_indicators"]["moving_averages"] == {"ma5": 102.0}
+    
+    def test_volatility_matches_sample_stdev(self):
+        """Test volatility equals the rounded sample standard deviation"""
+        prices = [2485.3, 2490.0, 2510.2, 2500.5, 2493.8, 2507.1]
+        
+        assert TechnicalIndicatorCalculator.calculate_volatility(prices) == round(statistics.stdev(prices), 4)
+        assert TechnicalIndicatorCalculator.calculate_volatility([2500.0]) == 0.0
+    
+    def test_sector_translations(self):
+        """Test known sectors get English names and descriptions, unknown ones fall back"""
+        sectors = LocalizationHelper.add_translations([{"name": "반도체"}, {"name": "기타"}])
+        
+        assert sectors[0]["name_en"] == "Semiconductors"
+        assert "semiconductor" in sectors[0]["description"]
+        assert sectors[1]["name_en"] == "기타"
+        assert sectors[1]["description"] == "Market sector"
 
 
 class TestDataValidationAndFormatting:
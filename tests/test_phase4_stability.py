@@ -5,18 +5,23 @@ Phase 4 TDD Tests - Stability and Error Handling Enhancements
 
 import pytest
 import asyncio
-from unittest.mock import Mock, AsyncMock, patch
+from unittest.mock import Mock, AsyncMock, MagicMock, patch
 from datetime import datetime, timedelta
-import aiohttp
 import time
+import threading
 import psutil
 import gc
 from typing import Dict, Any, List
 
 from src.api.client import KoreaInvestmentAPI
 from src.utils.cache import MarketDataCache
-from src.utils.retry import RetryHandler, CircuitBreaker, BackpressureHandler, CircuitBreakerState
-from src.utils.metrics import MetricsCollector, PerformanceMonitor
+from src.utils.retry import (
+    RetryHandler, CircuitBreaker, BackpressureHandler, CircuitBreakerState, RateLimitError
+)
+from src.utils.metrics import (
+    ERROR_TYPES_LIMIT, CacheMetrics, ErrorMetrics, MetricsCollector, OperationMetrics,
+    PerformanceMonitor, ResourceMonitor
+)
 from src.utils.validator import DataValidator
 from src.tools.index_tools import get_market_index, get_index_chart
 
@@ -59,21 +64,18 @@ class TestRetryAndResilienceLogic:
         """Test retry logic with rate limit handling"""
         retry_handler = RetryHandler(max_retries=3, base_delay=0.1)
         
-        # Mock rate limit error
-        rate_limit_error = aiohttp.ClientResponseError(
-            request_info=Mock(),
-            history=(),
-            status=429,
-            message="Rate limit exceeded"
-        )
+        # Rate limit error as raised by the API client on HTTP 429
+        rate_limit_error = RateLimitError("Too many requests")
         
         mock_func = AsyncMock()
         mock_func.side_effect = [rate_limit_error, {"success": True}]
         
-        result = await retry_handler.execute_with_retry(mock_func)
+        with patch("src.utils.retry.asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+            result = await retry_handler.execute_with_retry(mock_func)
         
         assert result == {"success": True}
         assert mock_func.call_count == 2
+        assert mock_sleep.await_args[0][0] >= 5.0  # Rate limits back off at least 5s
     
     @pytest.mark.asyncio
     async def test_circuit_breaker_pattern(self):
@@ -170,12 +172,12 @@ class TestConnectionPoolingAndResourceManagement:
                 # Expected since we don't have real API credentials
                 responses.append({"error": str(e)})
         
-        # Check that session is reused
-        assert api_client._session is not None
+        # Check that client is reused
+        assert api_client._client is not None
         
         # Check connection pool metrics
-        session_connector = api_client._session.connector
-        assert hasattr(session_connector, '_conns')
+        connection_pool = api_client._client._transport._pool
+        assert hasattr(connection_pool, 'connections')
         
         await api_client.close()
     
@@ -185,8 +187,8 @@ class TestConnectionPoolingAndResourceManagement:
         api_client = KoreaInvestmentAPI()
         
         # Force an error condition
-        with patch.object(api_client, '_session') as mock_session:
-            mock_session.get.side_effect = Exception("Connection error")
+        with patch.object(api_client, '_client') as mock_client:
+            mock_client.get.side_effect = Exception("Connection error")
             
             try:
                 await api_client.get_index_price("0001")
@@ -194,7 +196,7 @@ class TestConnectionPoolingAndResourceManagement:
                 pass
         
         # Resources should still be properly managed
-        assert api_client._session is not None
+        assert api_client._client is not None
         
         await api_client.close()
     
@@ -347,6 +349,23 @@ class TestPerformanceMonitoringAndMetrics:
         assert api_metrics["min_response_time"] >= 0.1
         assert api_metrics["max_response_time"] >= 0.1
     
+    @pytest.mark.asyncio
+    async def test_concurrent_operation_timing(self):
+        """Test concurrent timings of distinct operations are all recorded"""
+        metrics_collector = MetricsCollector()
+        
+        async def timed(name: str):
+            async with metrics_collector.time_operation(name):
+                await asyncio.sleep(0.01)
+        
+        await asyncio.gather(*(timed(f"op_{i % 4}") for i in range(40)))
+        metrics_collector.record_operation_success("op_0")
+        
+        all_metrics = metrics_collector.get_all_metrics()
+        assert set(all_metrics["operations"]) == {"op_0", "op_1", "op_2", "op_3"}
+        assert all(m["total_calls"] == 10 for m in all_metrics["operations"].values())
+        assert all_metrics["errors"]["op_0"]["total_operations"] == 1
+    
     @pytest.mark.asyncio
     async def test_cache_hit_rate_monitoring(self):
         """Test cache hit rate monitoring"""
@@ -370,6 +389,116 @@ class TestPerformanceMonitoringAndMetrics:
         assert cache_metrics["hit_rate"] == 0.5
         assert cache_metrics["miss_rate"] == 0.5
     
+    def test_operation_metrics_nanosecond_accumulation(self):
+        """Test timings accumulate as integer nanoseconds and report seconds"""
+        metrics = OperationMetrics()
+        for duration_ns in (1_500_000, 500_000, 1_000_000):
+            metrics.record_time(duration_ns)
+        
+        assert metrics.total_time_ns == 3_000_000
+        assert metrics.min_response_time_ns == 500_000
+        assert metrics.max_response_time_ns == 1_500_000
+        assert metrics.average_response_time == 0.001
+    
+    def test_error_types_bounded(self):
+        """Test error type tracking keeps only the most recently seen types"""
+        metrics = ErrorMetrics()
+        metrics.record_failure("Timeout")
+        for i in range(ERROR_TYPES_LIMIT):
+            metrics.record_failure(f"Error {i}")
+            if i == 100:
+                metrics.record_failure("Timeout")
+        
+        assert len(metrics.error_types) == ERROR_TYPES_LIMIT
+        assert metrics.error_types["Timeout"] == 2
+        assert "Error 0" not in metrics.error_types
+        assert metrics.failed_operations == ERROR_TYPES_LIMIT + 2
+    
+    def test_metrics_records_use_slots(self):
+        """Test metric records carry no per-instance __dict__"""
+        for record in (OperationMetrics(), CacheMetrics(), ErrorMetrics()):
+            assert not hasattr(record, "__dict__")
+    
+    def test_operation_metrics_response_time_window(self):
+        """Test response time ring buffer keeps the newest samples in order"""
+        metrics = OperationMetrics()
+        for duration_ns in range(1, 1206):
+            metrics.record_time(duration_ns)
+        
+        assert list(metrics.response_times) == list(range(206, 1206))
+        
+        merged = OperationMetrics()
+        merged.merge(metrics)
+        assert list(merged.response_times) == list(range(206, 1206))
+        assert merged.total_calls == 1205
+        
+        totals_only = OperationMetrics()
+        totals_only.merge(metrics, samples=False)
+        assert len(totals_only.response_times) == 0
+        assert totals_only.total_calls == 1205
+        assert totals_only.max_response_time_ns == 1205
+    
+    def test_operation_timing_merged_across_threads(self):
+        """Test per-thread timing shards are merged on read"""
+        metrics_collector = MetricsCollector()
+        
+        async def timed():
+            for _ in range(25):
+                async with metrics_collector.time_operation("api_call"):
+                    pass
+        
+        threads = [threading.Thread(target=asyncio.run, args=(timed(),)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        api_metrics = metrics_collector.get_metrics("api_call")
+        assert api_metrics["total_calls"] == 100
+        assert api_metrics["min_response_time"] <= api_metrics["max_response_time"]
+        assert list(metrics_collector.get_all_metrics()["operations"]) == ["api_call"]
+    
+    @pytest.mark.asyncio
+    async def test_preregistered_operations(self):
+        """Test operations registered up front are reported before first use"""
+        metrics_collector = MetricsCollector(operations=["api_call", "cache_lookup"])
+        
+        all_metrics = metrics_collector.get_all_metrics()
+        assert list(all_metrics["operations"]) == ["api_call", "cache_lookup"]
+        assert all_metrics["operations"]["api_call"]["total_calls"] == 0
+        assert all_metrics["errors"]["cache_lookup"]["total_operations"] == 0
+        
+        async with metrics_collector.time_operation("api_call"):
+            pass
+        assert metrics_collector.get_metrics("api_call")["total_calls"] == 1
+    
+    def test_cache_metrics_counts_across_threads(self):
+        """Test unlocked cache counters stay exact across threads and reads"""
+        metrics_collector = MetricsCollector()
+        
+        def record():
+            for i in range(1000):
+                if i % 4:
+                    metrics_collector.record_cache_hit("key")
+                else:
+                    metrics_collector.record_cache_miss("key")
+        
+        threads = [threading.Thread(target=record) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        # One lock-free counter shard per recording thread
+        assert len(metrics_collector.cache_metrics._shards) == 4
+        
+        # Reading must not disturb the counts
+        for _ in range(3):
+            cache_metrics = metrics_collector.get_cache_metrics()
+            assert cache_metrics["hits"] == 3000
+            assert cache_metrics["misses"] == 1000
+            assert cache_metrics["hit_rate"] == 0.75
+    
     @pytest.mark.asyncio
     async def test_error_rate_tracking(self):
         """Test error rate tracking"""
@@ -416,6 +545,72 @@ class TestPerformanceMonitoringAndMetrics:
         
         performance_monitor.stop_monitoring()
     
+    @pytest.mark.asyncio
+    async def test_monitoring_cadence_ignores_sample_time(self):
+        """Test slow samples don't stretch the monitoring interval"""
+        performance_monitor = PerformanceMonitor(monitoring_interval=0.05)
+        memory_info = Mock(rss=64 * 1024 * 1024)
+        
+        def slow_memory_info():
+            time.sleep(0.03)
+            return memory_info
+        
+        performance_monitor._process = MagicMock(memory_info=slow_memory_info)
+        performance_monitor.start_monitoring()
+        await asyncio.sleep(0.52)
+        performance_monitor.stop_monitoring()
+        
+        # Fixed-interval sleeps would only fit about 6 samples of 80ms each
+        history = performance_monitor.get_memory_metrics()["memory_history"]
+        assert len(history) >= 9
+        assert history[-1] == 64.0
+    
+    @pytest.mark.asyncio
+    async def test_resource_check_uses_monitor_samples(self):
+        """Test resource checks read the monitor's per-tick CPU and memory"""
+        performance_monitor = PerformanceMonitor(monitoring_interval=0.05)
+        performance_monitor._process = MagicMock(
+            memory_info=Mock(return_value=Mock(rss=600 * 1024 * 1024)),
+            cpu_percent=Mock(return_value=95.0)
+        )
+        resource_monitor = ResourceMonitor(performance_monitor=performance_monitor)
+        
+        performance_monitor.start_monitoring()
+        await asyncio.sleep(0.01)
+        result = resource_monitor.check_resources()
+        performance_monitor.stop_monitoring()
+        
+        assert result["memory_mb"] == 600.0
+        assert result["cpu_percent"] == 95.0
+        assert {alert["type"] for alert in result["alerts"]} == {"memory", "cpu"}
+    
+    @pytest.mark.asyncio
+    async def test_resource_check_falls_back_without_monitor_samples(self):
+        """Test resource checks sample the process when the monitor has nothing to offer"""
+        performance_monitor = PerformanceMonitor(monitoring_interval=0.05)
+        resource_monitor = ResourceMonitor(performance_monitor=performance_monitor)
+        resource_monitor._process = MagicMock(
+            memory_info=Mock(return_value=Mock(rss=600 * 1024 * 1024)),
+            cpu_percent=Mock(return_value=95.0)
+        )
+        
+        # Never started: no sample taken yet
+        result = resource_monitor.check_resources()
+        assert result["memory_mb"] == 600.0
+        assert {alert["type"] for alert in result["alerts"]} == {"memory", "cpu"}
+        
+        # Stopped after sampling: its last sample is stale
+        performance_monitor._process = MagicMock(
+            memory_info=Mock(return_value=Mock(rss=10 * 1024 * 1024)),
+            cpu_percent=Mock(return_value=1.0)
+        )
+        performance_monitor.start_monitoring()
+        await asyncio.sleep(0.01)
+        performance_monitor.stop_monitoring()
+        
+        result = resource_monitor.check_resources()
+        assert result["cpu_percent"] == 95.0
+    
     @pytest.mark.asyncio
     async def test_concurrent_request_monitoring(self):
         """Test monitoring of concurrent requests"""
@@ -9,6 +9,7 @@ import json
 import os
 import tempfile
 import time
+import threading
 from unittest.mock import Mock, patch, mock_open
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -29,8 +30,10 @@ from src.utils.monitoring import (
     AlertManager,
     DashboardDataProvider,
     SystemMetrics,
-    AlertSeverity
+    AlertSeverity,
+    _PsutilCache
 )
+from src.utils import monitoring
 from src.utils.metrics import MetricsCollector, PerformanceMonitor
 
 
@@ -73,6 +76,25 @@ class TestStructuredLogging:
         assert log_data["request_id"] == "req_456"
         assert log_data["market"] == "KOSPI"
     
+    def test_structured_log_formatter_skips_formatter_attrs(self):
+        """Test attributes added by other formatters are not treated as extras"""
+        record = logging.LogRecord(
+            name="test_logger",
+            level=logging.INFO,
+            pathname="/path/to/file.py",
+            lineno=1,
+            msg="Hello %s",
+            args=("world",),
+            exc_info=None
+        )
+        # A plain console formatter sets record.message and record.asctime
+        logging.Formatter('%(asctime)s %(message)s').format(record)
+        
+        log_data = json.loads(LogFormatter().format(record))
+        
+        assert log_data["message"] == "Hello world"
+        assert "asctime" not in log_data
+    
     def test_log_level_filtering(self):
         """Test log level filtering"""
         with tempfile.TemporaryDirectory() as temp_dir:
@@ -101,6 +123,19 @@ class TestStructuredLogging:
             assert "Warning message" in log_content
             assert "Error message" in log_content
     
+    def test_filtered_level_skips_record_creation(self):
+        """Test messages below the logger level never reach logger.log"""
+        logger = create_logger(name="test_filtered_logger", level=LogLevel.WARNING, console_output=False)
+        
+        with patch.object(logger.logger, "log") as mock_log:
+            with logger.context(request_id="req_1"):
+                logger.info("Dropped message", market="KOSPI")
+                logger.warning("Kept message")
+        
+        mock_log.assert_called_once()
+        assert mock_log.call_args[0][1] == "Kept message"
+        assert mock_log.call_args[1]["extra"] == {"request_id": "req_1"}
+    
     def test_console_and_file_output(self):
         """Test logging to both console and file"""
         with tempfile.TemporaryDirectory() as temp_dir:
@@ -163,6 +198,22 @@ class TestStructuredLogging:
             assert log_data["market"] == "KOSDAQ"
             assert log_data["message"] == "Test context message"
     
+    @pytest.mark.asyncio
+    async def test_log_context_isolated_between_tasks(self):
+        """Test concurrent tasks on one thread each see only their own context"""
+        logger = create_logger(name="test_task_context_logger", console_output=False)
+        
+        async def handle(request_id: str) -> Dict[str, Any]:
+            with logger.context(request_id=request_id):
+                await asyncio.sleep(0.01)  # Let the other task enter its context
+                return logger._get_context()
+        
+        first, second = await asyncio.gather(handle("req_1"), handle("req_2"))
+        
+        assert first == {"request_id": "req_1"}
+        assert second == {"request_id": "req_2"}
+        assert logger._get_context() == {}
+    
     def test_exception_logging(self):
         """Test exception logging with stack traces"""
         with tempfile.TemporaryDirectory() as temp_dir:
@@ -262,6 +313,30 @@ class TestFileRotationAndManagement:
             # Should create time-based rotation
             rotation_handler.should_rotate()
     
+    def test_log_file_rotation_at_time_boundary(self):
+        """Test a record stamped past the daily boundary rotates the file"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            log_file = Path(temp_dir) / "test.log"
+            
+            rotation_handler = FileRotationHandler(
+                file_path=str(log_file),
+                rotation_interval="daily",
+                max_files=5
+            )
+            
+            record = logging.LogRecord(
+                name="test", level=logging.INFO, pathname="test.py",
+                lineno=1, msg="Same day", args=(), exc_info=None
+            )
+            rotation_handler.emit(record)
+            assert len(list(Path(temp_dir).glob("test.log*"))) == 1
+            
+            record.created += 86400  # A day later
+            rotation_handler.emit(record)
+            rotation_handler.close()
+            
+            assert len(list(Path(temp_dir).glob("test.log*"))) == 2
+    
     def test_log_cleanup_old_files(self):
         """Test cleanup of old log files"""
         with tempfile.TemporaryDirectory() as temp_dir:
@@ -311,6 +386,18 @@ class TestMonitoringAndMetrics:
             call_args = mock_log.call_args[0][0]
             assert "Metrics summary" in call_args
     
+    def test_monitoring_collector_keeps_recent_window(self):
+        """Test collected metrics are capped and recent ones returned in order"""
+        monitoring = MonitoringCollector()
+        
+        for i in range(1005):
+            monitoring.collect_metrics({"sequence": i})
+        
+        assert len(monitoring.collected_metrics) == 1000
+        recent = monitoring.get_recent_metrics(3)
+        assert [m["sequence"] for m in recent] == [1002, 1003, 1004]
+        assert len(monitoring.get_recent_metrics(5000)) == 1000
+    
     @pytest.mark.asyncio
     async def test_health_checker(self):
         """Test system health checking"""
@@ -328,6 +415,39 @@ class TestMonitoringAndMetrics:
             assert health_status["components"]["cache"]["status"] == "healthy"
             assert health_status["components"]["database"]["status"] == "healthy"
     
+    @pytest.mark.asyncio
+    async def test_health_checks_run_concurrently(self):
+        """Test component checks overlap instead of running back to back"""
+        health_checker = HealthChecker()
+        
+        async def slow_check():
+            await asyncio.sleep(0.2)
+            return True
+        
+        def blocking_check():
+            time.sleep(0.2)
+            return True
+        
+        def failing_check():
+            raise RuntimeError("unreachable")
+        
+        health_checker.checks = {
+            "api": slow_check,
+            "cache": slow_check,
+            "database": blocking_check,
+            "disk": failing_check
+        }
+        
+        start = time.monotonic()
+        health_status = await health_checker.check_health()
+        elapsed = time.monotonic() - start
+        
+        assert elapsed < 0.5
+        assert list(health_status["components"]) == ["api", "cache", "database", "disk"]
+        assert health_status["components"]["database"]["status"] == "healthy"
+        assert health_status["components"]["disk"]["error"] == "unreachable"
+        assert health_status["status"] == "unhealthy"
+    
     @pytest.mark.asyncio
     async def test_health_checker_unhealthy(self):
         """Test health checker with unhealthy components"""
@@ -380,6 +500,14 @@ class TestMonitoringAndMetrics:
         assert error_alert.value == 0.08
         assert error_alert.threshold == 0.05
     
+    def test_alert_manager_skips_non_numeric_values(self):
+        """Test non-numeric metric values are ignored rather than compared"""
+        alert_manager = AlertManager()
+        alert_manager.configure_thresholds({"error_rate": 0.05, "response_time": 1.0})
+        
+        alerts = alert_manager.check_metrics({"error_rate": "n/a", "response_time": 1.5})
+        assert [alert.metric for alert in alerts] == ["response_time"]
+    
     def test_alert_manager_rate_limiting(self):
         """Test alert rate limiting to prevent spam"""
         alert_manager = AlertManager()
@@ -400,6 +528,38 @@ class TestMonitoringAndMetrics:
         
         # Should be rate limited
         assert len(alerts_sent) <= 3
+    
+    def test_active_alerts_expire_after_a_day(self):
+        """Test only alerts recorded in the last 24 hours are active"""
+        alert_manager = AlertManager()
+        alert_manager.configure_thresholds({"error_rate": 0.05, "response_time": 1.0})
+        
+        with patch("src.utils.monitoring.time.monotonic") as mock_monotonic:
+            mock_monotonic.return_value = 0.0
+            alert_manager.check_metrics({"error_rate": 0.1})
+            mock_monotonic.return_value = 90000.0
+            alert_manager.check_metrics({"response_time": 1.1})
+            
+            mock_monotonic.return_value = 100000.0
+            active = alert_manager.get_active_alerts()
+            assert [alert.metric for alert in active] == ["response_time"]
+            assert alert_manager.get_active_alerts(AlertSeverity.INFO) == active
+            assert alert_manager.get_active_alerts(AlertSeverity.CRITICAL) == []
+    
+    def test_alert_manager_cooldown_expires(self):
+        """Test alerts resume once the cooldown has passed"""
+        alert_manager = AlertManager()
+        alert_manager.configure_rate_limiting(max_alerts_per_minute=10, cooldown_minutes=1)
+        alert_manager.configure_thresholds({"error_rate": 0.05})
+        bad_metrics = {"error_rate": 0.1}
+        
+        with patch("src.utils.monitoring.time.monotonic") as mock_monotonic:
+            sent = []
+            for now in (1000.0, 1030.0, 1061.0):
+                mock_monotonic.return_value = now
+                sent.append(len(alert_manager.check_metrics(bad_metrics)))
+        
+        assert sent == [1, 0, 1]
 
 
 class TestDashboardDataProvider:
@@ -466,6 +626,67 @@ class TestDashboardDataProvider:
 class TestSystemMetricsIntegration:
     """Test system metrics integration with logging"""
     
+    def test_system_samples_shared_within_ttl(self):
+        """Test health checks and dashboards share one psutil sample per TTL"""
+        health_checker = HealthChecker()
+        dashboard = DashboardDataProvider()
+        system_metrics = SystemMetrics()
+        
+        with patch("src.utils.monitoring._psutil_cache", _PsutilCache()), \
+             patch("src.utils.monitoring.psutil.virtual_memory") as mock_memory:
+            mock_memory.return_value = Mock(percent=50.0, used=0, available=0)
+            
+            assert health_checker._check_memory_health() is True
+            assert health_checker._check_disk_health() in (True, False)
+            dashboard._get_current_metrics()
+            system_metrics._collect_system_metrics()
+            
+            assert mock_memory.call_count == 1
+    
+    def test_system_sample_cache_created_on_first_use(self):
+        """Test the shared psutil cache is built lazily, not at import"""
+        with patch("src.utils.monitoring._psutil_cache", None), \
+             patch("src.utils.monitoring.psutil.cpu_percent", return_value=0.0) as mock_cpu:
+            assert monitoring._psutil_cache is None
+            
+            monitoring._psutil_sample()
+            
+            assert isinstance(monitoring._psutil_cache, _PsutilCache)
+            assert mock_cpu.call_count == 1  # Baseline prime only
+    
+    def test_system_sample_shared_across_threads(self):
+        """Test concurrent first samples build one cache and refresh it once"""
+        barrier = threading.Barrier(8)
+        
+        def sample():
+            barrier.wait()
+            monitoring._psutil_sample()
+        
+        with patch("src.utils.monitoring._psutil_cache", None), \
+             patch("src.utils.monitoring.psutil.virtual_memory") as mock_memory, \
+             patch("src.utils.monitoring.psutil.cpu_percent", return_value=0.0) as mock_cpu:
+            threads = [threading.Thread(target=sample) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            
+            assert mock_cpu.call_count == 1  # A single prime
+            assert mock_memory.call_count == 1  # A single refresh
+    
+    def test_system_sample_withholds_cpu_until_a_ttl_after_prime(self):
+        """Test no CPU percent is reported over the near-zero interval after priming"""
+        with patch("src.utils.monitoring.time.monotonic") as mock_monotonic, \
+             patch("src.utils.monitoring.psutil.cpu_percent", return_value=42.0) as mock_cpu:
+            mock_monotonic.return_value = 100.0
+            cache = _PsutilCache()
+            
+            assert cache.sample(ttl=1.0)[1] is None
+            
+            mock_monotonic.return_value = 101.5
+            assert cache.sample(ttl=1.0)[1] == 42.0
+            assert mock_cpu.call_count == 2  # Prime, then one reading a full TTL later
+    
     @pytest.mark.asyncio
     async def test_system_metrics_logging(self):
         """Test automatic system metrics logging"""
@@ -581,4 +802,23 @@ class TestLogConfiguration:
             file_path="/tmp/custom.log"
         )
         
-        assert custom_logger.level == logging.DEBUG
\ No newline at end of file
+        assert custom_logger.level == logging.DEBUG
+    
+    def test_logger_factory_reuses_handlers(self):
+        """Test recreating a logger with the same config keeps its handlers"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            log_file = str(Path(temp_dir) / "reuse.log")
+            
+            first = create_logger("reuse_logger", file_path=log_file, console_output=False)
+            handlers = list(first.logger.handlers)
+            second = create_logger("reuse_logger", file_path=log_file, console_output=False)
+            
+            assert second.logger.handlers == handlers
+            
+            # A different configuration rebuilds them
+            third = create_logger("reuse_logger", level=LogLevel.DEBUG, file_path=log_file,
+                                  console_output=False)
+            assert third.logger.handlers != handlers
+            
+            for handler in third.logger.handlers:
+                handler.close()
@@ -2,10 +2,11 @@
 Tests for MCP Tools
 """
 import pytest
+import asyncio
 from unittest.mock import AsyncMock, Mock
 from datetime import datetime
 
-from src.tools.index_tools import get_market_index, get_index_chart
+from src.tools.index_tools import get_market_index, get_index_chart, _parse_index_data
 from src.tools.market_tools import get_market_summary, get_sector_indices, get_market_compare
 from src.utils.cache import MarketDataCache
 from src.api.client import KoreaInvestmentAPI
@@ -17,7 +18,9 @@ class TestIndexTools:
     @pytest.fixture
     def mock_cache(self):
         """Mock cache for testing"""
-        return Mock(spec=MarketDataCache)
+        cache = Mock(spec=MarketDataCache)
+        cache.is_stale.return_value = False
+        return cache
     
     @pytest.fixture
     def mock_api_client(self):
@@ -89,6 +92,30 @@ class TestIndexTools:
         assert kosdaq["change_rate"] == -0.60
         assert kosdaq["volume"] == 850000000
     
+    @pytest.mark.asyncio
+    async def test_get_market_index_all_fetches_concurrently(self, mock_cache, mock_api_client,
+                                                            mock_kospi_response, mock_kosdaq_response):
+        """Test KOSPI and KOSDAQ requests are in flight at the same time"""
+        in_flight = 0
+        max_in_flight = 0
+        
+        async def slow_fetch(key, fetch_func, ttl=5, stale_ttl=0):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.05)
+            in_flight -= 1
+            return mock_kospi_response if "KOSPI" in key else mock_kosdaq_response
+        
+        mock_cache.peek = Mock(return_value=None)
+        mock_cache.get_or_fetch = AsyncMock(side_effect=slow_fetch)
+        
+        result = await get_market_index("ALL", mock_cache, mock_api_client)
+        
+        assert max_in_flight == 2
+        assert result["kospi"]["current"] == 2500.50
+        assert result["kosdaq"]["current"] == 850.25
+    
     @pytest.mark.asyncio
     async def test_get_market_index_kospi_only(self, mock_cache, mock_api_client, mock_kospi_response):
         """Test getting KOSPI index only"""
@@ -104,6 +131,18 @@ class TestIndexTools:
         assert kospi["current"] == 2500.50
         assert kospi["change"] == 15.30
     
+    @pytest.mark.asyncio
+    async def test_get_market_index_counts_each_lookup_once(self, mock_api_client, mock_kospi_response):
+        """Test one request records exactly one cache hit or miss"""
+        cache = MarketDataCache()
+        mock_api_client.get_index_price = AsyncMock(return_value=mock_kospi_response)
+        
+        await get_market_index("KOSPI", cache, mock_api_client)
+        await get_market_index("KOSPI", cache, mock_api_client)
+        
+        stats = cache.get_stats()
+        assert (stats["hits"], stats["misses"]) == (1, 1)
+    
     @pytest.mark.asyncio
     async def test_get_market_index_kosdaq_only(self, mock_cache, mock_api_client, mock_kosdaq_response):
         """Test getting KOSDAQ index only"""
@@ -209,6 +248,17 @@ class TestIndexTools:
                 cache=mock_cache,
                 api_client=mock_api_client
             )
+    
+    def test_parse_index_data_missing_fields_default(self):
+        """Test absent output fields fall back to typed zero defaults"""
+        parsed = _parse_index_data({"output": {"bstp_nmix_prpr": "2500.50", "acml_vol": "1000"}})
+        
+        assert parsed["current"] == 2500.50
+        assert parsed["volume"] == 1000
+        assert parsed["change"] == 0.0
+        assert parsed["amount"] == 0
+        assert isinstance(parsed["amount"], int)
+        assert _parse_index_data({})["current"] == 0.0
 
 
 class TestMarketTools:
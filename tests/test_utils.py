@@ -7,7 +7,7 @@ from unittest.mock import patch, Mock, AsyncMock
 from datetime import datetime, timedelta
 
 from src.utils.logger import setup_logger, StructuredLogger
-from src.utils.retry import retry_on_error, APIError, RateLimitError
+from src.utils.retry import retry_on_error, parse_retry_after, AsyncTokenBucket, APIError, RateLimitError
 
 
 class TestLogger:
@@ -181,6 +181,76 @@ class TestRetryDecorator:
         assert result == "success"
         assert call_count == 2
     
+    @pytest.mark.asyncio
+    async def test_single_attempt_is_not_wrapped(self):
+        """Test that max_attempts=1 returns the function itself"""
+        async def flaky_func():
+            raise APIError("API Error")
+        
+        assert retry_on_error(max_attempts=1)(flaky_func) is flaky_func
+        with pytest.raises(APIError):
+            await retry_on_error(max_attempts=1)(flaky_func)()
+    
+    @pytest.mark.asyncio
+    async def test_retry_honors_retry_after(self):
+        """Test that a server-provided Retry-After overrides the backoff delay"""
+        call_times = []
+        
+        @retry_on_error(max_attempts=2, delay=0.01)
+        async def rate_limited_func():
+            call_times.append(datetime.now())
+            if len(call_times) == 1:
+                raise RateLimitError("Rate limit exceeded", retry_after=0.3)
+            return "success"
+        
+        result = await rate_limited_func()
+        
+        assert result == "success"
+        assert (call_times[1] - call_times[0]).total_seconds() >= 0.3
+    
+    @pytest.mark.asyncio
+    async def test_retry_delay_capped(self):
+        """Test that backoff delay is capped at max_delay"""
+        call_times = []
+        
+        @retry_on_error(max_attempts=3, delay=0.1, backoff=10.0, max_delay=0.15, jitter=0.0)
+        async def always_failing_func():
+            call_times.append(datetime.now())
+            raise APIError("Always fails")
+        
+        with pytest.raises(APIError):
+            await always_failing_func()
+        
+        assert (call_times[2] - call_times[1]).total_seconds() < 0.5
+    
+    @pytest.mark.asyncio
+    async def test_retry_after_and_jitter_capped(self):
+        """Test that Retry-After and jittered delays never exceed max_delay"""
+        call_times = []
+        
+        @retry_on_error(max_attempts=3, delay=0.1, max_delay=0.1, jitter=1.0)
+        async def rate_limited_func():
+            call_times.append(datetime.now())
+            if len(call_times) == 1:
+                raise RateLimitError("Rate limit exceeded", retry_after=60)
+            if len(call_times) == 2:
+                raise APIError("Transient")
+            return "success"
+        
+        result = await rate_limited_func()
+        
+        assert result == "success"
+        assert (call_times[1] - call_times[0]).total_seconds() < 0.5
+        assert (call_times[2] - call_times[1]).total_seconds() < 0.15
+    
+    def test_parse_retry_after(self):
+        """Test Retry-After header parsing"""
+        assert parse_retry_after("5") == 5.0
+        assert parse_retry_after(" 1.5 ") == 1.5
+        assert parse_retry_after(None) is None
+        assert parse_retry_after("not a date") is None
+        assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    
     @pytest.mark.asyncio
     async def test_retry_with_non_retryable_exception(self):
         """Test that non-retryable exceptions are not retried"""
@@ -253,6 +323,39 @@ class TestRetryDecorator:
         assert call_count == 3
 
 
+class TestAsyncTokenBucket:
+    """Test cases for token-bucket rate limiter"""
+    
+    @pytest.mark.asyncio
+    async def test_burst_within_capacity(self):
+        """Test that requests up to capacity are not delayed"""
+        bucket = AsyncTokenBucket(capacity=5, refill_per_sec=1)
+        
+        start = datetime.now()
+        for _ in range(5):
+            await bucket.acquire()
+        
+        assert (datetime.now() - start).total_seconds() < 0.1
+    
+    @pytest.mark.asyncio
+    async def test_waits_for_refill(self):
+        """Test that acquiring beyond capacity waits for refill"""
+        bucket = AsyncTokenBucket(capacity=1, refill_per_sec=10)
+        
+        await bucket.acquire()
+        start = datetime.now()
+        await bucket.acquire()
+        
+        assert (datetime.now() - start).total_seconds() >= 0.09
+    
+    def test_rejects_non_positive_rate(self):
+        """Test that a zero capacity or refill rate is rejected up front"""
+        with pytest.raises(ValueError):
+            AsyncTokenBucket(capacity=0, refill_per_sec=0)
+        with pytest.raises(ValueError):
+            AsyncTokenBucket(capacity=5, refill_per_sec=0)
+
+
 class TestAPIExceptions:
     """Test cases for API exception classes"""
     
@@ -263,6 +366,15 @@ class TestAPIExceptions:
         assert str(error) == "Test API error"
         assert isinstance(error, Exception)
     
+    def test_api_error_structured_fields(self):
+        """Test APIError built from status/detail formats its message on demand"""
+        status_error = APIError(op="Token request", status=500)
+        detail_error = APIError(detail=ConnectionError("Connection failed"))
+        
+        assert status_error.status == 500
+        assert str(status_error) == "Token request failed with status 500"
+        assert str(detail_error) == "API request failed: Connection failed"
+    
     def test_rate_limit_error_creation(self):
         """Test RateLimitError creation"""
         error = RateLimitError("Rate limit exceeded")